@@ -4,9 +4,14 @@ from __future__ import annotations
 
 import os
 import sqlite3
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
+from src.dashboard_db import get_conn
+from src.db import get_db_mtime
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DEFAULT_DB_PATH = "data/social.db"
 
@@ -15,45 +20,105 @@ def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
-def load_prayers(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+@st.cache_data(ttl=60)
+def load_prayers(
+    db_path: str,
+    db_mtime: int,
+    theme: str | None = None,
+    model: str | None = None,
+    limit: int = 200,
+) -> pd.DataFrame:
+    """Load the most recent prayers, filtered and limited in SQL.
+
+    Long text columns are left out; see ``load_prayer_detail``.
+    """
+    import pandas as pd
+
+    clauses: list[str] = []
+    params: list[str | int] = []
+    if theme:
+        clauses.append("t.slug = ?")
+        params.append(theme)
+    if model:
+        clauses.append("p.ai_model = ?")
+        params.append(model)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(limit)
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = get_conn(db_path)
     try:
         df = pd.read_sql_query(
-            """
+            f"""
             SELECT
                 p.id AS prayer_id,
-                p.prayer_text,
                 p.word_count,
                 p.ai_model,
                 p.created_at,
                 bv.reference AS verse_ref,
-                bv.text AS verse_text,
                 t.slug AS theme_slug,
-                t.name AS theme_name,
-                t.tone
+                t.name AS theme_name
             FROM prayers p
             LEFT JOIN bible_verses bv ON bv.id = p.verse_id
             LEFT JOIN themes t ON t.id = p.theme_id
+            {where}
             ORDER BY p.created_at DESC
+            LIMIT ?
             """,
             conn,
+            params=params,
         )
     except Exception:
         df = pd.DataFrame()
-    finally:
-        conn.close()
     return df
 
 
-def load_videos(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+@st.cache_data(ttl=60)
+def load_prayer_detail(db_path: str, db_mtime: int, prayer_id: int) -> dict | None:
+    """Load the prayer text, verse text and tone for a single prayer."""
+    cur = get_conn(db_path).cursor()
+    cur.row_factory = sqlite3.Row
+    row = cur.execute(
+        """
+        SELECT p.prayer_text, bv.text AS verse_text, t.tone
+        FROM prayers p
+        LEFT JOIN bible_verses bv ON bv.id = p.verse_id
+        LEFT JOIN themes t ON t.id = p.theme_id
+        WHERE p.id = ?
+        """,
+        (prayer_id,),
+    ).fetchone()
+    return dict(row) if row else None
 
-    conn = sqlite3.connect(db_path)
+
+@st.cache_data(ttl=60)
+def load_prayer_filter_options(db_path: str, db_mtime: int) -> tuple[list[str], list[str]]:
+    """Return the distinct theme slugs and AI models that have prayers."""
+    conn = get_conn(db_path)
+    try:
+        themes = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT t.slug FROM prayers p "
+                "JOIN themes t ON t.id = p.theme_id ORDER BY t.slug"
+            )
+        ]
+        models = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT ai_model FROM prayers "
+                "WHERE ai_model IS NOT NULL ORDER BY ai_model"
+            )
+        ]
+    except Exception:
+        return [], []
+    return themes, models
+
+
+@st.cache_data(ttl=60)
+def load_videos(db_path: str, db_mtime: int, limit: int = 200) -> pd.DataFrame:
+    import pandas as pd
+
+    conn = get_conn(db_path)
     try:
         df = pd.read_sql_query(
             """
@@ -73,21 +138,22 @@ def load_videos(db_path: str) -> pd.DataFrame:
             LEFT JOIN bible_verses bv ON bv.id = p.verse_id
             LEFT JOIN themes t ON t.id = p.theme_id
             ORDER BY gv.created_at DESC
+            LIMIT ?
             """,
             conn,
+            params=(limit,),
         )
     except Exception:
         df = pd.DataFrame()
-    finally:
-        conn.close()
     return df
 
 
-def load_themes_summary(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+@st.cache_data(ttl=60)
+def load_themes_summary(db_path: str, db_mtime: int) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
 
-    conn = sqlite3.connect(db_path)
+    conn = get_conn(db_path)
     try:
         df = pd.read_sql_query(
             """
@@ -108,10 +174,9 @@ def load_themes_summary(db_path: str) -> pd.DataFrame:
             """,
             conn,
         )
+        df["active"] = np.where(df["is_active"].astype(bool).to_numpy(), "Yes", "No")
     except Exception:
         df = pd.DataFrame()
-    finally:
-        conn.close()
     return df
 
 
@@ -124,15 +189,18 @@ st.title("Content Pipeline")
 st.caption("View generated prayers, videos, and theme coverage.")
 
 db_path = get_db_path()
+if not os.path.exists(db_path):
+    st.info(f"Database not found at `{db_path}`. Run `python -m src.main init-db` first.")
+    st.stop()
+db_mtime = get_db_mtime(db_path)
 
 # Theme overview
 st.subheader("Theme Coverage")
-themes_df = load_themes_summary(db_path)
+themes_df = load_themes_summary(db_path, db_mtime)
 
 if themes_df.empty:
     st.info("No themes found. Run `python -m src.main init-themes` first.")
 else:
-    themes_df["active"] = themes_df["is_active"].apply(lambda x: "Yes" if x else "No")
     st.dataframe(
         themes_df[["slug", "name", "tone", "active", "verse_count", "prayer_count", "video_count"]],
         hide_index=True,
@@ -143,49 +211,62 @@ st.divider()
 
 # Recent prayers
 st.subheader("Generated Prayers")
-prayers_df = load_prayers(db_path)
+theme_options, model_options = load_prayer_filter_options(db_path, db_mtime)
 
-if prayers_df.empty:
-    st.info("No prayers generated yet. Run `python -m src.main generate --theme grief`.")
-else:
-    # Filters
-    col1, col2 = st.columns(2)
-    with col1:
-        theme_filter = st.selectbox(
-            "Filter by theme",
-            ["All"] + sorted(prayers_df["theme_slug"].dropna().unique().tolist()),
-        )
-    with col2:
-        model_filter = st.selectbox(
-            "Filter by model",
-            ["All"] + sorted(prayers_df["ai_model"].dropna().unique().tolist()),
-        )
+# Filters
+col1, col2 = st.columns(2)
+with col1:
+    theme_filter = st.selectbox("Filter by theme", ["All"] + theme_options)
+with col2:
+    model_filter = st.selectbox("Filter by model", ["All"] + model_options)
 
-    filtered = prayers_df.copy()
-    if theme_filter != "All":
-        filtered = filtered[filtered["theme_slug"] == theme_filter]
-    if model_filter != "All":
-        filtered = filtered[filtered["ai_model"] == model_filter]
+filtered = load_prayers(
+    db_path,
+    db_mtime,
+    theme=None if theme_filter == "All" else theme_filter,
+    model=None if model_filter == "All" else model_filter,
+)
 
+if filtered.empty:
+    if theme_filter == "All" and model_filter == "All":
+        st.info("No prayers generated yet. Run `python -m src.main generate --theme grief`.")
+    else:
+        st.info("No prayers match the selected filters.")
+else:
     st.metric("Prayers shown", len(filtered))
 
-    for _, row in filtered.head(20).iterrows():
+    event = st.dataframe(
+        filtered[["prayer_id", "verse_ref", "theme_name", "word_count", "ai_model", "created_at"]],
+        hide_index=True,
+        width="stretch",
+        on_select="rerun",
+        selection_mode="single-row",
+        key="prayers_table",
+    )
+
+    # Render the full prayer only for the selected row
+    if event.selection.rows:
+        row = filtered.iloc[event.selection.rows[0]]
+        detail = load_prayer_detail(db_path, db_mtime, int(row["prayer_id"])) or {}
         with st.expander(
             f"Prayer #{row['prayer_id']} — {row['verse_ref']} ({row['theme_name']}) "
-            f"[{row['word_count']} words]"
+            f"[{row['word_count']} words]",
+            expanded=True,
         ):
             st.markdown(f"**Verse:** {row['verse_ref']}")
-            st.markdown(f"> {row['verse_text']}")
-            st.markdown(f"**Theme:** {row['theme_name']} | **Tone:** {row['tone']}")
+            st.markdown(f"> {detail.get('verse_text')}")
+            st.markdown(f"**Theme:** {row['theme_name']} | **Tone:** {detail.get('tone')}")
             st.markdown(f"**Model:** {row['ai_model']} | **Created:** {row['created_at']}")
             st.markdown("---")
-            st.markdown(row["prayer_text"])
+            st.markdown(detail.get("prayer_text") or "")
+    else:
+        st.caption("Select a prayer in the table to read it.")
 
 st.divider()
 
 # Generated videos
 st.subheader("Generated Videos")
-videos_df = load_videos(db_path)
+videos_df = load_videos(db_path, db_mtime)
 
 if videos_df.empty:
     st.info("No videos generated yet. Run `python -m src.main compose <prayer_id>`.")
@@ -3,10 +3,14 @@
 from __future__ import annotations
 
 import os
-import sqlite3
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
+from src.dashboard_db import get_conn
+from src.db import get_db_mtime, read_dashboard_summary
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DEFAULT_DB_PATH = "data/social.db"
 
@@ -15,14 +19,20 @@ def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
-def load_queue(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+@st.cache_data(ttl=60)
+def load_queue(
+    db_path: str, db_mtime: int, status: str | None = None, limit: int = 500
+) -> pd.DataFrame:
+    """Load queue items, newest first, optionally filtered by status in SQL."""
+    import pandas as pd
+
+    where = "WHERE pq.status = ?" if status else ""
+    params = (status, limit) if status else (limit,)
 
-    conn = sqlite3.connect(db_path)
+    conn = get_conn(db_path)
     try:
         df = pd.read_sql_query(
-            """
+            f"""
             SELECT
                 pq.id AS queue_id,
                 pq.video_id,
@@ -41,75 +51,75 @@ def load_queue(db_path: str) -> pd.DataFrame:
             LEFT JOIN prayers p ON p.id = gv.prayer_id
             LEFT JOIN bible_verses bv ON bv.id = p.verse_id
             LEFT JOIN themes t ON t.id = p.theme_id
+            {where}
             ORDER BY pq.scheduled_at DESC
+            LIMIT ?
             """,
             conn,
+            params=params,
         )
     except Exception:
         df = pd.DataFrame()
-    finally:
-        conn.close()
     return df
 
 
-def approve_item(db_path: str, queue_id: int) -> bool:
-    conn = sqlite3.connect(db_path)
-    try:
-        from src.db import now_utc
+def approve_items(db_path: str, queue_ids: list[int]) -> int:
+    """Approve pending queue items in one transaction. Returns rows updated."""
+    from src.db import now_utc
 
-        cur = conn.execute(
+    ts = now_utc()
+    conn = get_conn(db_path)
+    with conn:
+        cur = conn.executemany(
             "UPDATE publish_queue SET status = 'approved', updated_at = ? "
             "WHERE id = ? AND status = 'pending'",
-            (now_utc(), queue_id),
+            [(ts, int(qid)) for qid in queue_ids],
         )
-        conn.commit()
-        return cur.rowcount > 0
-    finally:
-        conn.close()
+    return cur.rowcount
 
 
-def get_safety_status(db_path: str) -> dict:
+@st.cache_data(ttl=60)
+def get_safety_status(db_path: str, db_mtime: int) -> dict:
     """Check current safety status."""
-    if not os.path.exists(db_path):
-        return {"published_count": 0, "needs_approval": True, "can_publish": True, "reason": "OK"}
-
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        published = conn.execute(
-            "SELECT COUNT(*) as cnt FROM publish_queue WHERE status = 'published'"
-        ).fetchone()["cnt"]
-
-        pending = conn.execute(
-            "SELECT COUNT(*) as cnt FROM publish_queue WHERE status = 'pending'"
-        ).fetchone()["cnt"]
-
-        approved = conn.execute(
-            "SELECT COUNT(*) as cnt FROM publish_queue WHERE status = 'approved'"
-        ).fetchone()["cnt"]
-
-        failed = conn.execute(
-            "SELECT COUNT(*) as cnt FROM publish_queue WHERE status = 'failed'"
-        ).fetchone()["cnt"]
-
-        # Check consecutive failures
-        recent = conn.execute(
-            "SELECT status FROM publish_queue ORDER BY updated_at DESC LIMIT 3"
-        ).fetchall()
-        consecutive_fails = (
-            len(recent) >= 3 and all(r["status"] == "failed" for r in recent)
+    conn = get_conn(db_path)
+    # Trigger-maintained aggregates; older DBs without them fall back to queries
+    summary = read_dashboard_summary(conn)
+    if "pq_counts" in summary and "pq_recent_statuses" in summary:
+        counts = summary["pq_counts"]
+        recent = summary["pq_recent_statuses"]
+    else:
+        # One grouped scan instead of a COUNT(*) per status
+        counts = dict(
+            conn.execute(
+                "SELECT status, COUNT(*) as cnt FROM publish_queue "
+                "WHERE status IS NOT NULL GROUP BY status"
+            ).fetchall()
         )
+        recent = [
+            status
+            for (status,) in conn.execute(
+                "SELECT status FROM publish_queue ORDER BY updated_at DESC LIMIT 3"
+            )
+        ]
+    published = counts.get("published", 0)
+    pending = counts.get("pending", 0)
+    approved = counts.get("approved", 0)
+    failed = counts.get("failed", 0)
+
+    # Check consecutive failures
+    consecutive_fails = (
+        len(recent) >= 3 and all(status == "failed" for status in recent)
+    )
 
-        return {
-            "published_count": published,
-            "pending_count": pending,
-            "approved_count": approved,
-            "failed_count": failed,
-            "needs_approval": published < 10,
-            "consecutive_fails": consecutive_fails,
-        }
-    finally:
-        conn.close()
+    return {
+        "published_count": published,
+        "pending_count": pending,
+        "approved_count": approved,
+        "failed_count": failed,
+        "needs_approval": published < 10,
+        "consecutive_fails": consecutive_fails,
+        "status_counts": counts,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -121,10 +131,14 @@ st.title("Publish Queue")
 st.caption("Manage scheduled posts, approvals, and publishing status.")
 
 db_path = get_db_path()
+if not os.path.exists(db_path):
+    st.info(f"Database not found at `{db_path}`. Run `python -m src.main init-db` first.")
+    st.stop()
+db_mtime = get_db_mtime(db_path)
 
 # Safety status
 st.subheader("Safety Status")
-safety = get_safety_status(db_path)
+safety = get_safety_status(db_path, db_mtime)
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Published", safety.get("published_count", 0))
@@ -150,51 +164,58 @@ st.divider()
 
 # Queue table
 st.subheader("Queue Items")
-queue_df = load_queue(db_path)
+status_counts = safety.get("status_counts", {})
 
-if queue_df.empty:
+if not status_counts:
     st.info(
         "Queue is empty. Schedule a video: "
         "`python -m src.main schedule <video_id> <datetime>`"
     )
 else:
-    # Status filter
-    status_options = ["All"] + sorted(queue_df["status"].dropna().unique().tolist())
+    # Status filter (each status is its own cached, indexed query)
+    status_options = ["All"] + sorted(status_counts)
     status_filter = st.selectbox("Filter by status", status_options)
 
-    filtered = queue_df.copy()
-    if status_filter != "All":
-        filtered = filtered[filtered["status"] == status_filter]
-
-    # Display columns
-    display_cols = [
-        "queue_id", "verse_ref", "theme_name", "platform",
-        "scheduled_at", "status", "published_at", "retry_count", "error_message",
-    ]
-    available = [c for c in display_cols if c in filtered.columns]
-    st.dataframe(filtered[available], hide_index=True, width="stretch")
-
-    # Approve pending items
-    pending_items = filtered[filtered["status"] == "pending"]
-    if not pending_items.empty:
-        st.subheader("Approve Pending Items")
-        for _, row in pending_items.iterrows():
-            qid = row["queue_id"]
-            label = f"#{qid} — {row.get('verse_ref', '?')} ({row.get('theme_name', '?')})"
-            if st.button(f"Approve {label}", key=f"approve_{qid}"):
-                if approve_item(db_path, qid):
-                    st.success(f"Approved queue item #{qid}")
-                    st.rerun()
-                else:
-                    st.error(f"Could not approve #{qid} (may already be approved)")
-
-    # Show errors for failed items
-    failed_items = filtered[filtered["status"] == "failed"]
-    if not failed_items.empty:
-        st.subheader("Failed Items")
-        for _, row in failed_items.iterrows():
-            with st.expander(
-                f"#{row['queue_id']} — {row.get('verse_ref', '?')} "
-                f"(retries: {row.get('retry_count', 0)})"
-            ):
-                st.code(row.get("error_message", "No error message"))
+    filtered = load_queue(
+        db_path, db_mtime, status=None if status_filter == "All" else status_filter
+    )
+
+    if filtered.empty:
+        st.info("No queue items match the selected status.")
+    else:
+        # Display columns
+        display_cols = [
+            "queue_id", "verse_ref", "theme_name", "platform",
+            "scheduled_at", "status", "published_at", "retry_count", "error_message",
+        ]
+        available = [c for c in display_cols if c in filtered.columns]
+        st.dataframe(filtered[available], hide_index=True, width="stretch")
+
+        # Approve pending items
+        pending_items = filtered[filtered["status"] == "pending"]
+        if not pending_items.empty:
+            st.subheader("Approve Pending Items")
+            if st.button(f"Approve all visible pending ({len(pending_items)})"):
+                approved = approve_items(db_path, pending_items["queue_id"].tolist())
+                st.success(f"Approved {approved} queue item(s)")
+                st.rerun()
+            for _, row in pending_items.iterrows():
+                qid = row["queue_id"]
+                label = f"#{qid} — {row.get('verse_ref', '?')} ({row.get('theme_name', '?')})"
+                if st.button(f"Approve {label}", key=f"approve_{qid}"):
+                    if approve_items(db_path, [qid]):
+                        st.success(f"Approved queue item #{qid}")
+                        st.rerun()
+                    else:
+                        st.error(f"Could not approve #{qid} (may already be approved)")
+
+        # Show errors for failed items
+        failed_items = filtered[filtered["status"] == "failed"]
+        if not failed_items.empty:
+            st.subheader("Failed Items")
+            for _, row in failed_items.iterrows():
+                with st.expander(
+                    f"#{row['queue_id']} — {row.get('verse_ref', '?')} "
+                    f"(retries: {row.get('retry_count', 0)})"
+                ):
+                    st.code(row.get("error_message", "No error message"))
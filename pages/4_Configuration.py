@@ -4,15 +4,22 @@ from __future__ import annotations
 
 import json
 import os
+from typing import TYPE_CHECKING
 
 import streamlit as st
 from src.config import (
+    DEFAULT_CONFIG_PATH,
     delete_config_override,
     flatten_config,
     load_config,
     load_db_overrides,
     set_config_override,
 )
+from src.dashboard_db import get_conn
+from src.db import get_db_mtime
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DEFAULT_DB_PATH = "data/social.db"
 
@@ -21,6 +28,53 @@ def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
+def get_yaml_mtime() -> float:
+    """Modification time of config/default.yaml (0.0 if missing)."""
+    try:
+        return os.path.getmtime(DEFAULT_CONFIG_PATH)
+    except OSError:
+        return 0.0
+
+
+@st.cache_data(ttl=30)
+def load_settings(
+    db_path: str, db_mtime: int, yaml_mtime: float
+) -> tuple[dict, list[tuple[str, object]], dict]:
+    """Return the merged config, its flattened items and the DB overrides."""
+    config = load_config(db_path)
+    return config, flatten_config(config), load_db_overrides(db_path)
+
+
+@st.cache_data(ttl=30)
+def load_themes(db_path: str, db_mtime: int) -> pd.DataFrame:
+    import pandas as pd
+
+    conn = get_conn(db_path)
+    df = pd.read_sql_query(
+        "SELECT id, slug, name, is_active FROM themes ORDER BY slug", conn
+    )
+    df["is_active"] = df["is_active"].astype(bool)
+    return df
+
+
+def save_theme_activation(db_path: str, changes: list[tuple[int, int]]) -> None:
+    """Apply ``(is_active, theme_id)`` updates in a single transaction."""
+    conn = get_conn(db_path)
+    with conn:
+        conn.executemany("UPDATE themes SET is_active = ? WHERE id = ?", changes)
+    load_themes.clear()
+
+
+def save_override(key: str, value: object, db_path: str) -> None:
+    set_config_override(key, value, db_path)
+    load_settings.clear()
+
+
+def remove_override(key: str, db_path: str) -> None:
+    delete_config_override(key, db_path)
+    load_settings.clear()
+
+
 # ---------------------------------------------------------------------------
 # Page layout
 # ---------------------------------------------------------------------------
@@ -32,9 +86,7 @@ st.caption("View YAML defaults, manage dashboard overrides stored in SQLite.")
 db_path = get_db_path()
 
 # Load current merged config
-config = load_config(db_path)
-flat = flatten_config(config)
-overrides = load_db_overrides(db_path)
+config, flat, overrides = load_settings(db_path, get_db_mtime(db_path), get_yaml_mtime())
 
 # ---------------------------------------------------------------------------
 # Current config table
@@ -64,7 +116,7 @@ else:
         col1.code(key)
         col2.code(json.dumps(value))
         if col3.button("Delete", key=f"del_{key}"):
-            delete_config_override(key, db_path)
+            remove_override(key, db_path)
             st.success(f"Deleted override: {key}")
             st.rerun()
 
@@ -101,7 +153,7 @@ with st.form("override_form"):
                 # Treat as raw string if not valid JSON
                 parsed = new_value_str.strip()
 
-            set_config_override(new_key.strip(), parsed, db_path)
+            save_override(new_key.strip(), parsed, db_path)
             st.success(f"Override saved: {new_key.strip()} = {parsed}")
             st.rerun()
 
@@ -121,7 +173,7 @@ new_speed = st.slider(
 )
 if new_speed != current_speed:
     if st.button("Save voice speed"):
-        set_config_override("voice.speed", new_speed, db_path)
+        save_override("voice.speed", new_speed, db_path)
         st.success(f"Voice speed set to {new_speed}")
         st.rerun()
 
@@ -132,7 +184,7 @@ new_font = st.slider(
 )
 if new_font != current_font:
     if st.button("Save prayer font size"):
-        set_config_override("text.prayer_font_size", new_font, db_path)
+        save_override("text.prayer_font_size", new_font, db_path)
         st.success(f"Prayer font size set to {new_font}")
         st.rerun()
 
@@ -147,7 +199,7 @@ new_interval = st.number_input(
 )
 if new_interval != current_interval:
     if st.button("Save post interval"):
-        set_config_override("publishing.min_hours_between_posts", new_interval, db_path)
+        save_override("publishing.min_hours_between_posts", new_interval, db_path)
         st.success(f"Min hours between posts set to {new_interval}")
         st.rerun()
 
@@ -156,31 +208,22 @@ st.divider()
 st.subheader("Theme Activation")
 
 if os.path.exists(db_path):
-    import sqlite3
-
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        themes = conn.execute(
-            "SELECT id, slug, name, is_active FROM themes ORDER BY slug"
-        ).fetchall()
-
-        if themes:
-            for theme in themes:
-                active = bool(theme["is_active"])
-                new_active = st.checkbox(
-                    f"{theme['name']} ({theme['slug']})",
-                    value=active,
-                    key=f"theme_active_{theme['id']}",
-                )
-                if new_active != active:
-                    conn.execute(
-                        "UPDATE themes SET is_active = ? WHERE id = ?",
-                        (1 if new_active else 0, theme["id"]),
-                    )
-                    conn.commit()
-                    st.rerun()
-        else:
-            st.info("No themes in database.")
-    finally:
-        conn.close()
+    themes_df = load_themes(db_path, get_db_mtime(db_path))
+
+    if not themes_df.empty:
+        edited = st.data_editor(
+            themes_df,
+            column_config={"is_active": st.column_config.CheckboxColumn("Active")},
+            disabled=["id", "slug", "name"],
+            hide_index=True,
+            key="themes_edit",
+        )
+        changed = edited[edited["is_active"] != themes_df["is_active"]]
+        if not changed.empty:
+            save_theme_activation(
+                db_path,
+                [(int(active), int(tid)) for tid, active in zip(changed["id"], changed["is_active"])],
+            )
+            st.rerun()
+    else:
+        st.info("No themes in database.")
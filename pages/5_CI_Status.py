@@ -4,9 +4,14 @@ from __future__ import annotations
 
 import os
 import sqlite3
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
+from src.dashboard_db import get_conn
+from src.db import get_db_mtime, read_dashboard_summary
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DEFAULT_DB_PATH = "data/social.db"
 
@@ -15,18 +20,19 @@ def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
-def load_test_runs(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+@st.cache_data(ttl=60)
+def load_test_runs(db_path: str, db_mtime: int) -> pd.DataFrame:
+    import pandas as pd
 
-    conn = sqlite3.connect(db_path)
+    conn = get_conn(db_path)
     try:
         df = pd.read_sql_query(
             """
             SELECT
                 id, run_id, status, tests_passed, tests_failed,
                 tests_skipped, duration_sec, commit_sha, branch,
-                started_at, completed_at
+                started_at, completed_at,
+                CAST(strftime('%s', completed_at) AS INTEGER) AS completed_at_ts
             FROM test_runs
             ORDER BY completed_at DESC
             LIMIT 50
@@ -34,27 +40,28 @@ def load_test_runs(db_path: str) -> pd.DataFrame:
             conn,
         )
     except Exception:
-        df = pd.DataFrame()
-    finally:
-        conn.close()
+        return pd.DataFrame()
+    # completed_at is parsed to epoch seconds in SQL; numeric -> datetime is vectorized
+    df["completed_at_dt"] = pd.to_datetime(df["completed_at_ts"], unit="s")
     return df
 
 
-def get_latest_run(db_path: str) -> dict | None:
-    if not os.path.exists(db_path):
-        return None
+@st.cache_data(ttl=60)
+def get_latest_run(db_path: str, db_mtime: int) -> dict | None:
+    # Trigger-maintained point lookup; older DBs without it fall back to a query
+    summary = read_dashboard_summary(get_conn(db_path))
+    if "latest_run" in summary:
+        return summary["latest_run"]
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    cur = get_conn(db_path).cursor()
+    cur.row_factory = sqlite3.Row
     try:
-        row = conn.execute(
+        row = cur.execute(
             "SELECT * FROM test_runs ORDER BY completed_at DESC LIMIT 1"
         ).fetchone()
         return dict(row) if row else None
     except Exception:
         return None
-    finally:
-        conn.close()
 
 
 # ---------------------------------------------------------------------------
@@ -66,9 +73,13 @@ st.title("CI / Test Status")
 st.caption("View test run history and build health from the test_runs table.")
 
 db_path = get_db_path()
+if not os.path.exists(db_path):
+    st.info(f"Database not found at `{db_path}`. Run `python -m src.main init-db` first.")
+    st.stop()
+db_mtime = get_db_mtime(db_path)
 
 # Latest run summary
-latest = get_latest_run(db_path)
+latest = get_latest_run(db_path, db_mtime)
 
 if latest is None:
     st.info(
@@ -106,20 +117,20 @@ st.divider()
 
 # Run history
 st.subheader("Run History")
-runs_df = load_test_runs(db_path)
+runs_df = load_test_runs(db_path, db_mtime)
 
 if runs_df.empty:
     st.info("No test run history available.")
 else:
     # Pass/fail chart
-    if "completed_at" in runs_df.columns and "tests_passed" in runs_df.columns:
-        chart_df = runs_df.copy()
-        chart_df["completed_at"] = pd.to_datetime(chart_df["completed_at"], errors="coerce")
-        chart_df = chart_df.dropna(subset=["completed_at"])
+    if "completed_at_dt" in runs_df.columns and "tests_passed" in runs_df.columns:
+        chart_df = runs_df.dropna(subset=["completed_at_dt"])
 
         if not chart_df.empty:
             st.line_chart(
-                chart_df.set_index("completed_at")[["tests_passed", "tests_failed"]],
+                chart_df.set_index("completed_at_dt").rename_axis("completed_at")[
+                    ["tests_passed", "tests_failed"]
+                ],
             )
 
     # Table
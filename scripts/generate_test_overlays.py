@@ -1,5 +1,7 @@
 """Generate sample overlay PNGs for visual review of the hook-based layout."""
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from src.media.text_overlay import generate_single_overlay
@@ -72,22 +74,29 @@ SAMPLES = [
 ]
 
 
+def _render_one(sample: dict[str, str]) -> Path:
+    # Render straight to a per-sample path so workers never share a temp file
+    dest = SAMPLES_DIR / f"{sample['name']}.png"
+    generate_single_overlay(
+        verse_ref=sample["verse_ref"],
+        verse_text=sample["verse_text"],
+        prayer_text=sample["prayer_text"],
+        theme_slug=sample["theme_slug"],
+        chunk_index=0,
+        hook_text=sample["hook_text"],
+        out_path=dest,
+    )
+    return dest
+
+
 def main() -> None:
     SAMPLES_DIR.mkdir(parents=True, exist_ok=True)
 
-    for sample in SAMPLES:
-        path = generate_single_overlay(
-            verse_ref=sample["verse_ref"],
-            verse_text=sample["verse_text"],
-            prayer_text=sample["prayer_text"],
-            theme_slug=sample["theme_slug"],
-            chunk_index=0,
-            hook_text=sample["hook_text"],
-        )
-        # Move to samples dir with descriptive name
-        dest = SAMPLES_DIR / f"{sample['name']}.png"
-        Path(path).rename(dest)
-        print(f"  Saved: {dest}")
+    # Each sample is rendered independently, so fan out across processes
+    workers = min(len(SAMPLES), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for dest in ex.map(_render_one, SAMPLES):
+            print(f"  Saved: {dest}")
 
     print(f"\nDone! Review samples in {SAMPLES_DIR}/")
 
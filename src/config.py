@@ -2,70 +2,114 @@
 
 from __future__ import annotations
 
+import copy
 import json
+import os
+import sqlite3
+from functools import lru_cache, reduce
 from pathlib import Path
 from typing import Any
 
 import yaml
 
-from src.db import connect, now_utc
+from src.db import (
+    get_db_mtime,
+    get_db_path,
+    get_shared_connection,
+    init_schema,
+    now_utc,
+)
 
 CONFIG_DIR = Path("config")
 DEFAULT_CONFIG_PATH = CONFIG_DIR / "default.yaml"
 
+# libyaml-backed loader when available; same safe semantics, C parser
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_yaml(path: Path | str) -> dict[str, Any]:
     p = Path(path)
     if not p.exists():
         return {}
-    with open(p) as f:
-        return yaml.safe_load(f) or {}
+    with open(p, "rb") as f:
+        return yaml.load(f, Loader=_YAML_LOADER) or {}
+
+
+def _mtime_ns(path: Path | str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+@lru_cache(maxsize=4)
+def _load_yaml_cached(path: str, mtime_ns: int) -> dict[str, Any]:
+    return load_yaml(path)
 
 
 def load_defaults() -> dict[str, Any]:
-    return load_yaml(DEFAULT_CONFIG_PATH)
+    # Re-parsed only when default.yaml's mtime changes; callers get a copy
+    path = DEFAULT_CONFIG_PATH
+    return copy.deepcopy(_load_yaml_cached(str(path), _mtime_ns(path)))
+
+
+# First characters json.loads accepts (including the NaN/Infinity that
+# json.dumps emits for floats, and leading whitespace); anything else is a
+# raw string
+_JSON_FIRST = frozenset('{["-0123456789tfnNI \t\n\r')
+
+
+def _decode_override(value: Any) -> Any:
+    if not isinstance(value, str) or not value or value[0] not in _JSON_FIRST:
+        return value
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
 
 
 def load_db_overrides(db_path: str | None = None) -> dict[str, Any]:
     """Load config overrides from the config_overrides table."""
     try:
-        conn = connect(db_path)
-        cur = conn.execute("SELECT key, value FROM config_overrides")
-        overrides: dict[str, Any] = {}
-        for row in cur.fetchall():
-            key, value = row["key"], row["value"]
-            try:
-                overrides[key] = json.loads(value)
-            except (json.JSONDecodeError, TypeError):
-                overrides[key] = value
-        conn.close()
-        return overrides
+        conn = get_shared_connection(db_path)
+        return {
+            key: _decode_override(value)
+            for key, value in conn.execute("SELECT key, value FROM config_overrides")
+        }
     except Exception:
         return {}
 
 
+_MISSING = object()
+
+
+@lru_cache(maxsize=1024)
+def _split_key(dotted_key: str) -> tuple[str, ...]:
+    return tuple(dotted_key.split("."))
+
+
 def _set_nested(d: dict[str, Any], dotted_key: str, value: Any) -> None:
     """Set a nested dict value using a dotted key like 'voice.speed'."""
-    keys = dotted_key.split(".")
-    for k in keys[:-1]:
+    *parents, last = _split_key(dotted_key)
+    for k in parents:
         d = d.setdefault(k, {})
-    d[keys[-1]] = value
+    d[last] = value
 
 
 def _get_nested(d: dict[str, Any], dotted_key: str, default: Any = None) -> Any:
     """Get a nested dict value using a dotted key like 'voice.speed'."""
-    keys = dotted_key.split(".")
-    for k in keys:
-        if not isinstance(d, dict):
-            return default
-        d = d.get(k, default)
-        if d is default:
-            return default
-    return d
+    value = reduce(
+        lambda node, k: node.get(k, _MISSING) if isinstance(node, dict) else _MISSING,
+        _split_key(dotted_key),
+        d,
+    )
+    return default if value is _MISSING else value
 
 
-def load_config(db_path: str | None = None) -> dict[str, Any]:
-    """Load merged config: YAML defaults + DB overrides."""
+@lru_cache(maxsize=8)
+def _load_config_cached(
+    db_path: str, yaml_mtime_ns: int, db_mtime_ns: int
+) -> dict[str, Any]:
     config = load_defaults()
     overrides = load_db_overrides(db_path)
     for key, value in overrides.items():
@@ -73,44 +117,95 @@ def load_config(db_path: str | None = None) -> dict[str, Any]:
     return config
 
 
+def _merged_config(db_path: str | None) -> dict[str, Any]:
+    """Return the shared (do not mutate) merged config for *db_path*.
+
+    Cached on the mtimes of default.yaml and the DB file (plus its WAL
+    sidecar), so edits from other processes are still picked up.
+    """
+    if db_path is None:
+        db_path = get_db_path()
+    return _load_config_cached(
+        db_path, _mtime_ns(DEFAULT_CONFIG_PATH), get_db_mtime(db_path)
+    )
+
+
+def load_config(db_path: str | None = None) -> dict[str, Any]:
+    """Load merged config: YAML defaults + DB overrides."""
+    return copy.deepcopy(_merged_config(db_path))
+
+
 def get_config_value(
     key: str, default: Any = None, db_path: str | None = None
 ) -> Any:
     """Get a single config value by dotted key."""
-    config = load_config(db_path)
-    return _get_nested(config, key, default)
+    value = _get_nested(_merged_config(db_path), key, default)
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+def get_config_values(
+    defaults: dict[str, Any], db_path: str | None = None
+) -> dict[str, Any]:
+    """Get several config values at once from a single merged-config snapshot.
+
+    *defaults* maps dotted keys to their fallback values.
+    """
+    config = _merged_config(db_path)
+    values = {key: _get_nested(config, key, default) for key, default in defaults.items()}
+    return {
+        key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        for key, value in values.items()
+    }
+
+
+# DB paths whose schema this process has already ensured (init_schema is
+# idempotent but runs the full DDL script + summary backfill)
+_schema_ready: set[str] = set()
+
+
+def _override_connection(db_path: str | None) -> sqlite3.Connection:
+    path = db_path or get_db_path()
+    conn = get_shared_connection(path)
+    if path not in _schema_ready:
+        init_schema(conn)
+        _schema_ready.add(path)
+    return conn
 
 
 def set_config_override(
     key: str, value: Any, db_path: str | None = None
 ) -> None:
     """Set a config override in the database."""
-    conn = connect(db_path)
-    from src.db import init_schema
-
-    init_schema(conn)
-    json_value = json.dumps(value)
-    conn.execute(
-        """
-        INSERT INTO config_overrides (key, value, updated_at)
-        VALUES (:key, :value, :updated_at)
-        ON CONFLICT(key) DO UPDATE SET
-            value = excluded.value,
-            updated_at = excluded.updated_at
-        """,
-        {"key": key, "value": json_value, "updated_at": now_utc()},
-    )
-    conn.commit()
-    conn.close()
+    set_config_overrides({key: value}, db_path)
+
+
+def set_config_overrides(
+    overrides: dict[str, Any], db_path: str | None = None
+) -> None:
+    """Set several config overrides in one transaction."""
+    conn = _override_connection(db_path)
+    updated_at = now_utc()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO config_overrides (key, value, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                updated_at = excluded.updated_at
+            """,
+            [(key, json.dumps(value), updated_at) for key, value in overrides.items()],
+        )
+    _load_config_cached.cache_clear()
 
 
 def delete_config_override(key: str, db_path: str | None = None) -> bool:
     """Delete a config override. Returns True if a row was deleted."""
-    conn = connect(db_path)
+    conn = get_shared_connection(db_path)
     cur = conn.execute("DELETE FROM config_overrides WHERE key = ?", (key,))
     conn.commit()
     deleted = cur.rowcount > 0
-    conn.close()
+    _load_config_cached.cache_clear()
     return deleted
 
 
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import re
 import sqlite3
 from typing import Any
 
@@ -13,25 +14,46 @@ MIN_WORDS = 70   # ~30s floor
 MAX_WORDS = 95   # ~40s ceiling
 TARGET_WORDS = 82  # sweet spot ≈35s
 
+# "Book Chapter:Verse" with an optional "-Verse" range end
+_REF_RE = re.compile(r"^(.+?)\s+(\d+):(\d+)(?:-(\d+))?$")
+
+
+# The system prompt does not vary per call, so it is rendered once at import
+_SYSTEM_PROMPT = (
+    "You are a prayer writer for a daily TikTok series aimed at Christians "
+    "aged 45 and older. Your prayers should feel personal, conversational, "
+    "and spoken directly to God.\n\n"
+    "RULES:\n"
+    f"- Write exactly {TARGET_WORDS} words (hard limit: {MIN_WORDS}-{MAX_WORDS}).\n"
+    "- Use second-person address to God (\"Father\", \"Lord\", \"God\").\n"
+    "- Match the theme and tone provided.\n"
+    "- Never use prosperity-gospel language (\"claim your blessing\", "
+    "\"name it and claim it\", etc.).\n"
+    "- Never promise physical healing or financial gain.\n"
+    "- Be honest about struggle while pointing to hope.\n"
+    "- End with a brief, humble closing (\"In Jesus' name, Amen\" or similar).\n"
+    "- Naturally weave the Bible verse reference (e.g. 'as Your word says in "
+    "Psalm 23') into the prayer. Do not quote the full verse text word-for-word.\n"
+    "- Output ONLY the prayer text, no titles or labels."
+)
+
+# User prompt; {hook_block} is either empty or _USER_HOOK_TEMPLATE rendered
+_USER_TEMPLATE = (
+    "Theme: {theme_name}\n"
+    "Tone: {tone}\n"
+    "Verse: {verse_reference} — \"{verse_text}\"\n\n"
+    "{hook_block}"
+    f"Write a {TARGET_WORDS}-word prayer inspired by this verse for the theme above."
+)
+_USER_HOOK_TEMPLATE = (
+    "Hook question for this video: {hook}\n"
+    "Write the prayer to speak to someone who would answer "
+    "'yes' to this question.\n\n"
+)
+
 
 def _build_system_prompt(theme_name: str, tone: str) -> str:
-    return (
-        "You are a prayer writer for a daily TikTok series aimed at Christians "
-        "aged 45 and older. Your prayers should feel personal, conversational, "
-        "and spoken directly to God.\n\n"
-        "RULES:\n"
-        f"- Write exactly {TARGET_WORDS} words (hard limit: {MIN_WORDS}-{MAX_WORDS}).\n"
-        "- Use second-person address to God (\"Father\", \"Lord\", \"God\").\n"
-        "- Match the theme and tone provided.\n"
-        "- Never use prosperity-gospel language (\"claim your blessing\", "
-        "\"name it and claim it\", etc.).\n"
-        "- Never promise physical healing or financial gain.\n"
-        "- Be honest about struggle while pointing to hope.\n"
-        "- End with a brief, humble closing (\"In Jesus' name, Amen\" or similar).\n"
-        "- Naturally weave the Bible verse reference (e.g. 'as Your word says in "
-        "Psalm 23') into the prayer. Do not quote the full verse text word-for-word.\n"
-        "- Output ONLY the prayer text, no titles or labels."
-    )
+    return _SYSTEM_PROMPT
 
 
 def _build_user_prompt(
@@ -41,19 +63,13 @@ def _build_user_prompt(
     tone: str,
     hook: str = "",
 ) -> str:
-    prompt = (
-        f"Theme: {theme_name}\n"
-        f"Tone: {tone}\n"
-        f"Verse: {verse_reference} — \"{verse_text}\"\n\n"
+    return _USER_TEMPLATE.format(
+        theme_name=theme_name,
+        tone=tone,
+        verse_reference=verse_reference,
+        verse_text=verse_text,
+        hook_block=_USER_HOOK_TEMPLATE.format(hook=hook) if hook else "",
     )
-    if hook:
-        prompt += (
-            f"Hook question for this video: {hook}\n"
-            "Write the prayer to speak to someone who would answer "
-            "'yes' to this question.\n\n"
-        )
-    prompt += f"Write a {TARGET_WORDS}-word prayer inspired by this verse for the theme above."
-    return prompt
 
 
 def generate_prayer_text(
@@ -108,15 +124,34 @@ def _tts_friendly_ref(ref: str) -> str:
     'Psalm 91:9-11' → 'Psalm 91, verses 9 through 11'
     'John 3:16'     → 'John chapter 3, verse 16'
     """
-    import re
-    # Match "Book Chapter:Verse-Verse" or "Book Chapter:Verse"
-    m = re.match(r'^(.+?)\s+(\d+):(\d+)-(\d+)$', ref)
-    if m:
-        return f"{m.group(1)} chapter {m.group(2)}, verses {m.group(3)} through {m.group(4)}"
-    m = re.match(r'^(.+?)\s+(\d+):(\d+)$', ref)
-    if m:
-        return f"{m.group(1)} chapter {m.group(2)}, verse {m.group(3)}"
-    return ref
+    m = _REF_RE.match(ref)
+    if not m:
+        return ref
+    book, chapter, start, end = m.groups()
+    if end:
+        return f"{book} chapter {chapter}, verses {start} through {end}"
+    return f"{book} chapter {chapter}, verse {start}"
+
+
+# Fallback prayer; only {ref}, {name} and {tone} vary per call
+_FALLBACK_TEMPLATE = (
+    "Heavenly Father, we come before You today with hearts open to Your word. "
+    "As we reflect on {ref}, we are reminded of Your faithfulness. "
+    "Lord, in this season of {name}, grant us a spirit that is {tone}. "
+    "Help us to trust in Your plan even when the path is unclear. "
+    "We know that You hold every moment of our lives in Your hands. "
+    "Strengthen us, Lord, to face each day with courage and grace. "
+    "Remind us that we are never alone, for You walk beside us always. "
+    "Fill our hearts with peace that surpasses all understanding. "
+    "May our words and actions reflect Your love to those around us. "
+    "Guide us to be a light in the lives of our families and communities. "
+    "We surrender our worries, our fears, and our doubts to You. "
+    "Replace them with hope, with faith, and with the assurance of Your promises. "
+    "Thank You, Father, for never giving up on us. "
+    "Thank You for Your mercy that is new every morning. "
+    "We love You, and we trust You with all that lies ahead. "
+    "In Jesus' name, Amen."
+)
 
 
 def generate_prayer_text_fallback(
@@ -128,23 +163,8 @@ def generate_prayer_text_fallback(
     name = theme.get("name", "faith")
     ref = _tts_friendly_ref(verse["reference"])
 
-    return (
-        f"Heavenly Father, we come before You today with hearts open to Your word. "
-        f"As we reflect on {ref}, we are reminded of Your faithfulness. "
-        f"Lord, in this season of {name.lower()}, grant us a spirit that is {tone}. "
-        f"Help us to trust in Your plan even when the path is unclear. "
-        f"We know that You hold every moment of our lives in Your hands. "
-        f"Strengthen us, Lord, to face each day with courage and grace. "
-        f"Remind us that we are never alone, for You walk beside us always. "
-        f"Fill our hearts with peace that surpasses all understanding. "
-        f"May our words and actions reflect Your love to those around us. "
-        f"Guide us to be a light in the lives of our families and communities. "
-        f"We surrender our worries, our fears, and our doubts to You. "
-        f"Replace them with hope, with faith, and with the assurance of Your promises. "
-        f"Thank You, Father, for never giving up on us. "
-        f"Thank You for Your mercy that is new every morning. "
-        f"We love You, and we trust You with all that lies ahead. "
-        f"In Jesus' name, Amen."
+    return _FALLBACK_TEMPLATE.format_map(
+        {"ref": ref, "name": name.lower(), "tone": tone}
     )
 
 
@@ -154,8 +174,12 @@ def save_prayer(
     theme_id: int,
     prayer_text: str,
     ai_model: str | None = None,
+    commit: bool = True,
 ) -> int:
-    """Insert a prayer into the database and return its id."""
+    """Insert a prayer into the database and return its id.
+
+    Pass ``commit=False`` to leave the insert in the caller's transaction.
+    """
     word_count = len(prayer_text.split())
     cur = conn.execute(
         """
@@ -165,5 +189,6 @@ def save_prayer(
         """,
         (verse_id, theme_id, prayer_text, word_count, ai_model, now_utc()),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return cur.lastrowid
@@ -2,18 +2,66 @@
 
 from __future__ import annotations
 
-import random
 import sqlite3
+import time
+from functools import lru_cache
 from typing import Any
 
+from src.db import get_db_mtime, get_shared_connection
 
-def get_active_themes(conn: sqlite3.Connection) -> list[dict[str, Any]]:
-    """Return all active themes as dicts."""
-    cur = conn.execute(
-        "SELECT id, slug, name, description, keywords, tone, voice_id, hook "
-        "FROM themes WHERE is_active = 1 ORDER BY slug"
+# Upper bound on how long a cached active-theme list is served, on top of
+# the DB mtime check (which catches writes from other processes).
+ACTIVE_THEMES_TTL_SEC = 60
+
+_ACTIVE_THEMES_SQL = (
+    "SELECT id, slug, name, description, keywords, tone, voice_id, hook "
+    "FROM themes WHERE is_active = 1 ORDER BY slug"
+)
+
+
+def _db_file(conn: sqlite3.Connection) -> str:
+    """Return the file backing *conn*'s main database ("" for in-memory)."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _fetch_active_themes(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    return cur.execute(_ACTIVE_THEMES_SQL).fetchall()
+
+
+@lru_cache(maxsize=4)
+def _get_active_themes_cached(
+    db_path: str, db_mtime_ns: int, ttl_bucket: int
+) -> tuple[sqlite3.Row, ...]:
+    return tuple(_fetch_active_themes(get_shared_connection(db_path)))
+
+
+def clear_active_themes_cache() -> None:
+    """Drop memoized active-theme lists, e.g. after a bulk theme import."""
+    _get_active_themes_cached.cache_clear()
+
+
+def get_active_themes(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    """Return all active themes as read-only ``sqlite3.Row`` mappings.
+
+    Results are memoized per database file, keyed on its mtime and a
+    ``ACTIVE_THEMES_TTL_SEC`` time bucket. Connections with an open
+    transaction (or in-memory databases) always query directly so they see
+    their own uncommitted writes.
+    """
+    db_path = _db_file(conn)
+    if not db_path or conn.in_transaction:
+        return _fetch_active_themes(conn)
+
+    # Rows are immutable, so the cached ones can be shared without copying
+    return list(
+        _get_active_themes_cached(
+            db_path,
+            get_db_mtime(db_path),
+            int(time.monotonic() // ACTIVE_THEMES_TTL_SEC),
+        )
     )
-    return [dict(row) for row in cur.fetchall()]
 
 
 def get_theme_by_slug(
@@ -46,27 +94,24 @@ def pick_theme(
         return None
 
     # Rank active themes by the latest last_used_at of their verses
-    # (themes with no usage history sort first → freshest).
+    # (themes with no usage history sort first → freshest), breaking
+    # ties randomly so only the chosen row leaves SQLite.
     cur = conn.execute(
         """
-        SELECT t.id, t.slug, t.name, t.description, t.keywords, t.tone, t.voice_id, t.hook,
-               MAX(bv.last_used_at) AS latest_use
-        FROM themes t
-        LEFT JOIN bible_verses bv ON bv.theme_id = t.id
-        WHERE t.is_active = 1
-        GROUP BY t.id
+        SELECT id, slug, name, description, keywords, tone, voice_id, hook
+        FROM (
+            SELECT t.id, t.slug, t.name, t.description, t.keywords, t.tone,
+                   t.voice_id, t.hook, MAX(bv.last_used_at) AS latest_use
+            FROM themes t
+            LEFT JOIN bible_verses bv ON bv.theme_id = t.id
+            WHERE t.is_active = 1
+            GROUP BY t.id
+        )
         ORDER BY latest_use IS NOT NULL,   -- NULLs (never used) first
-                 latest_use ASC            -- then oldest usage
+                 latest_use ASC,           -- then oldest usage
+                 RANDOM()
+        LIMIT 1
         """
     )
-    rows = [dict(r) for r in cur.fetchall()]
-    if not rows:
-        return None
-
-    # Take all themes tied for "least recently used"
-    first_use = rows[0].get("latest_use")
-    candidates = [r for r in rows if r.get("latest_use") == first_use]
-    chosen = random.choice(candidates)
-    # Drop the helper column before returning
-    chosen.pop("latest_use", None)
-    return chosen
+    row = cur.fetchone()
+    return dict(row) if row else None
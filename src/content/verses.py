@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import random
 import sqlite3
 from typing import Any
 
@@ -11,14 +10,20 @@ from src.db import now_utc
 
 def get_verses_for_theme(
     conn: sqlite3.Connection, theme_id: int
-) -> list[dict[str, Any]]:
-    """Return all verses belonging to *theme_id*, ordered by used_count ASC."""
-    cur = conn.execute(
+) -> list[sqlite3.Row]:
+    """Return all verses belonging to *theme_id*, ordered by used_count ASC.
+
+    Rows are read-only mappings (``row["reference"]``); call ``dict(row)``
+    on the ones you need to modify.
+    """
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    cur.execute(
         "SELECT id, reference, text, translation, tone, used_count, last_used_at "
         "FROM bible_verses WHERE theme_id = ? ORDER BY used_count ASC, last_used_at ASC",
         (theme_id,),
     )
-    return [dict(row) for row in cur.fetchall()]
+    return cur.fetchall()
 
 
 def pick_verse(
@@ -30,17 +35,23 @@ def pick_verse(
     Verses with the lowest ``used_count`` are preferred.  Among those,
     we pick randomly to keep things fresh.
     """
-    verses = get_verses_for_theme(conn, theme_id)
-    if not verses:
-        return None
+    cur = conn.execute(
+        "SELECT id, reference, text, translation, tone, used_count, last_used_at "
+        "FROM bible_verses WHERE theme_id = ? "
+        "ORDER BY COALESCE(used_count, 0) ASC, RANDOM() LIMIT 1",
+        (theme_id,),
+    )
+    row = cur.fetchone()
+    return dict(row) if row else None
 
-    min_count = verses[0]["used_count"] or 0
-    candidates = [v for v in verses if (v["used_count"] or 0) == min_count]
-    return random.choice(candidates)
 
+def mark_verse_used(
+    conn: sqlite3.Connection, verse_id: int, commit: bool = True
+) -> None:
+    """Increment used_count and set last_used_at for a verse.
 
-def mark_verse_used(conn: sqlite3.Connection, verse_id: int) -> None:
-    """Increment used_count and set last_used_at for a verse."""
+    Pass ``commit=False`` to leave the update in the caller's transaction.
+    """
     conn.execute(
         """
         UPDATE bible_verses
@@ -50,4 +61,5 @@ def mark_verse_used(conn: sqlite3.Connection, verse_id: int) -> None:
         """,
         (now_utc(), verse_id),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
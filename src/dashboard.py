@@ -3,13 +3,28 @@ from __future__ import annotations
 import os
 import sqlite3
 import subprocess
+import sys
 from datetime import timedelta
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+# `streamlit run src/dashboard.py` puts src/, not the repo root, on sys.path
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.db import get_db_mtime  # noqa: E402
+
+# Copy-on-Write: derived frames share column blocks until one is written,
+# so no defensive .copy() is needed. Always on (and the option deprecated)
+# from pandas 3.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 DEFAULT_DB_PATH = "data/social.db"
 LOCAL_TZ = ZoneInfo("America/Chicago")
 
@@ -17,53 +32,206 @@ LOCAL_TZ = ZoneInfo("America/Chicago")
 DATE_RANGE_KEY = "date_range_central_v2"
 MIN_VIEWS_KEY = "min_views"
 CAPTION_KEY = "caption_search"
+SECTION_KEY = "dashboard_section"
+SECTIONS = ("Charts", "Posts")
+
+COUNT_DTYPES = {
+    "views": "int64",
+    "engagement": "int64",
+    "likes": "int32",
+    "comments": "int32",
+    "shares": "int32",
+    "favorites": "int32",
+}
+TEXT_COLUMNS = ("post_id", "caption", "url")
+
+# Most posts rendered in the Posts table (KPIs and charts use all of them)
+POSTS_TABLE_LIMIT = 500
+
+# Rows fetched from SQLite per DataFrame chunk in load_posts
+READ_CHUNK_ROWS = 50_000
 
 
 def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
-def load_posts(db_path: str) -> pd.DataFrame:
-    if not os.path.exists(db_path):
-        return pd.DataFrame()
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    """Open *db_path* for the dashboard's read-only queries.
 
+    query_only guards against accidental writes; mmap lets SQLite read pages
+    straight from the OS page cache instead of through read() calls.
+    """
     conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA query_only=ON;")
+    conn.execute("PRAGMA mmap_size=268435456;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    return conn
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_date_bounds(db_path: str, db_mtime: int) -> tuple[pd.Timestamp | None, pd.Timestamp | None]:
+    """Return the earliest and latest post times (local tz), or Nones if no posts."""
+    if not os.path.exists(db_path):
+        return None, None
+
+    conn = connect_readonly(db_path)
     try:
-        df = pd.read_sql_query(
-            """
+        lo, hi = conn.execute(
+            "SELECT MIN(created_at), MAX(created_at) FROM tiktok_posts "
+            "WHERE created_at IS NOT NULL"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    if lo is None:
+        return None, None
+    bounds = pd.to_datetime(pd.Series([lo, hi]), errors="coerce", utc=True, format="ISO8601").dt.tz_convert(LOCAL_TZ)
+    return bounds.iloc[0], bounds.iloc[1]
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_posts(
+    db_path: str,
+    db_mtime: int,
+    start_utc: str,
+    end_utc: str,
+    min_views: int = 0,
+    caption_search: str = "",
+) -> pd.DataFrame:
+    """Load posts with ``start_utc <= created_at < end_utc``, filtered in SQL.
+
+    Rows come back ordered by views, highest first. NULL views count as 0,
+    so those posts are kept at the default ``min_views`` of 0.
+
+    The range is an integer scan on idx_tiktok_posts_epoch_views, and timestamps
+    arrive as epoch seconds, so nothing is string-parsed. Databases not yet
+    migrated to created_at_epoch fall back to comparing the UTC ISO-8601
+    strings, which order lexicographically. Caption search goes through the
+    tiktok_posts_fts trigram index when it exists.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        # table_xinfo also lists the generated created_at_epoch/engagement
+        columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(tiktok_posts)")}
+        engagement = (
+            "engagement"
+            if "engagement" in columns
+            else "COALESCE(likes, 0) + COALESCE(comments, 0) + COALESCE(shares, 0)"
+        )
+        if "created_at_epoch" in columns:
+            where = ["created_at_epoch >= ?", "created_at_epoch < ?", "COALESCE(views, 0) >= ?"]
+            params: list[str | int] = [
+                int(pd.Timestamp(start_utc).timestamp()),
+                int(pd.Timestamp(end_utc).timestamp()),
+                min_views,
+            ]
+            created_at_dt = "created_at_epoch"
+            parse_dt = {"unit": "s", "utc": True}
+        else:
+            where = ["created_at >= ?", "created_at < ?", "COALESCE(views, 0) >= ?"]
+            params = [start_utc, end_utc, min_views]
+            created_at_dt = "created_at"
+            # ISO8601 accepts rows with and without fractional seconds,
+            # which isoformat() mixes
+            parse_dt = {"utc": True, "errors": "coerce", "format": "ISO8601"}
+
+        if caption_search:
+            has_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'tiktok_posts_fts'"
+            ).fetchone()
+            if has_fts and len(caption_search) >= 3:
+                # Trigram index lookup; quoting makes the term a literal phrase
+                phrase = '"' + caption_search.replace('"', '""') + '"'
+                where.append(
+                    "rowid IN (SELECT rowid FROM tiktok_posts_fts WHERE tiktok_posts_fts MATCH ?)"
+                )
+                params.append(phrase)
+            else:
+                escaped = caption_search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                where.append("caption LIKE ? ESCAPE '\\'")
+                params.append(f"%{escaped}%")
+
+        chunks = pd.read_sql_query(
+            f"""
             SELECT
                 post_id,
                 created_at,
-                views,
+                {created_at_dt} AS created_at_dt,
+                COALESCE(views, 0) AS views,
                 likes,
                 comments,
                 shares,
                 favorites,
+                {engagement} AS engagement,
                 caption,
                 url
             FROM tiktok_posts
+            WHERE {" AND ".join(where)}
+            ORDER BY views DESC
             """,
             conn,
+            params=params,
+            chunksize=READ_CHUNK_ROWS,
+            parse_dates={"created_at_dt": parse_dt},  # UTC, per chunk
         )
+        df = pd.concat(chunks, ignore_index=True)
     finally:
         conn.close()
 
     if df.empty:
         return df
 
-    # Parse timestamps as UTC, then convert for display and filtering
-    df["created_at_dt"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
+    # Convert for display and day bucketing
     df["created_at_local"] = df["created_at_dt"].dt.tz_convert(LOCAL_TZ)
+    # Naive local midnight (int64-backed datetime64) as the chart day key;
+    # computed here so reruns that hit the cache skip it
+    df["day"] = df["created_at_local"].dt.tz_localize(None).dt.normalize()
+
+    # The count columns are INTEGER in the schema (NULL only when the export
+    # lacked them), so a single fillna/astype replaces per-column coercion.
+    # Per-post interaction counts fit in 32 bits; views can pass 2**31 on a
+    # viral post so they stay 64-bit, as does the SQL-computed engagement.
+    df = df.fillna(dict.fromkeys(COUNT_DTYPES, 0)).astype(COUNT_DTYPES)
+    # Arrow-backed text: contiguous UTF-8 with native nulls, and st.dataframe
+    # serializes it to Arrow without a per-object conversion
+    df = df.astype(dict.fromkeys(TEXT_COLUMNS, "string[pyarrow]"))
+
+    # Avoid divide-by-zero: rows with no views keep a 0.0 rate
+    views = df["views"].to_numpy()
+    df["engagement_rate"] = np.divide(
+        df["engagement"].to_numpy(),
+        views,
+        out=np.zeros(len(df), dtype=float),
+        where=views > 0,
+    )
 
-    for col in ["views", "likes", "comments", "shares", "favorites"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+    return df
 
-    df["engagement"] = df["likes"] + df["comments"] + df["shares"]
 
-    # Avoid divide-by-zero
-    views_nonzero = df["views"].replace({0: pd.NA})
-    df["engagement_rate"] = (df["engagement"] / views_nonzero).fillna(0.0)
+@st.cache_data(ttl=30, show_spinner=False)
+def load_daily_stats(db_path: str, db_mtime: int, start_day: str, end_day: str) -> pd.DataFrame:
+    """Read the importer's daily_stats rollup for ``start_day..end_day`` (inclusive).
 
+    Returns an empty frame when the table does not exist yet.
+    """
+    conn = connect_readonly(db_path)
+    try:
+        df = pd.read_sql_query(
+            """
+            SELECT day, views_sum AS views, er_mean AS engagement_rate, n_posts
+            FROM daily_stats
+            WHERE day BETWEEN ? AND ?
+            ORDER BY day
+            """,
+            conn,
+            params=(start_day, end_day),
+        )
+    except pd.errors.DatabaseError:
+        return pd.DataFrame(columns=["day", "views", "engagement_rate", "n_posts"])
+    finally:
+        conn.close()
+    df["day"] = pd.to_datetime(df["day"], format="%Y-%m-%d")
     return df
 
 
@@ -79,9 +247,10 @@ db_path = get_db_path()
 st.sidebar.header("Data")
 st.sidebar.code(db_path)
 
-df = load_posts(db_path)
+db_mtime = get_db_mtime(db_path)
+min_ts, max_ts = load_date_bounds(db_path, db_mtime)
 
-if df.empty:
+if min_ts is None:
     st.warning(
         "No data found. Run `python -m src.main doctor` and `python -m src.main import data/tiktok_posts.csv` first."
     )
@@ -90,9 +259,6 @@ if df.empty:
 # Filters
 st.sidebar.header("Filters")
 
-min_ts = df["created_at_local"].dropna().min()
-max_ts = df["created_at_local"].dropna().max()
-
 if pd.isna(min_ts) or pd.isna(max_ts):
     st.warning("No parsable created_at dates found in DB.")
     st.stop()
@@ -183,28 +349,30 @@ if st.sidebar.button("Export report (Markdown)"):
         st.sidebar.error("Export failed. See details below.")
         st.sidebar.code((e.stdout or "") + "\n" + (e.stderr or ""))
 
-filtered = df[df["created_at_local"].notna()].copy()
-filtered = filtered[
-    (filtered["created_at_local"].dt.date >= start_date)
-    & (filtered["created_at_local"].dt.date <= end_date)
-]
-filtered = filtered[filtered["views"] >= int(min_views)]
-
-if caption_search:
-    filtered = filtered[
-        filtered["caption"].fillna("").str.contains(caption_search, case=False, na=False)
-    ]
+# Local calendar days -> half-open UTC range, evaluated in SQL
+start_utc = pd.Timestamp(start_date, tz=LOCAL_TZ).tz_convert("UTC").isoformat()
+end_utc = (pd.Timestamp(end_date, tz=LOCAL_TZ) + pd.Timedelta(days=1)).tz_convert("UTC").isoformat()
+filtered = load_posts(db_path, db_mtime, start_utc, end_utc, int(min_views), caption_search)
 
 if filtered.empty:
     st.warning("No posts match the current filters. Widen the date range or reduce min views.")
     st.stop()
 
-# KPI summary
+# KPI summary: one agg call; rows are the reductions, columns the inputs
+kpi = filtered.agg(
+    {
+        "views": ["sum", "median"],
+        "engagement": "sum",
+        "engagement_rate": "mean",
+        "shares": "sum",
+    }
+)
 total_posts = len(filtered)
-total_views = int(filtered["views"].sum())
-total_eng = int(filtered["engagement"].sum())
-avg_er = float(filtered["engagement_rate"].mean()) * 100.0
-median_views = float(filtered["views"].median())
+total_views = int(kpi.at["sum", "views"])
+total_eng = int(kpi.at["sum", "engagement"])
+avg_er = float(kpi.at["mean", "engagement_rate"]) * 100.0
+median_views = float(kpi.at["median", "views"])
+total_shares = int(kpi.at["sum", "shares"])
 
 c1, c2, c3, c4, c5 = st.columns(5)
 c1.metric("Posts", fmt_int(total_posts))
@@ -215,47 +383,62 @@ c5.metric("Median views", f"{median_views:.1f}")
 
 st.divider()
 
-# Charts
-left, right = st.columns(2)
+# Only the selected section is built; st.tabs would run both on every rerun
+section = st.radio("Section", SECTIONS, horizontal=True, key=SECTION_KEY, label_visibility="collapsed")
+
+if section == "Charts":
+    # Charts: unfiltered windows read the importer's daily_stats rollup; it is
+    # used only if its post count matches, otherwise one groupby over the
+    # filtered frame feeds both daily series
+    by_day = None
+    if not min_views and not caption_search:
+        by_day = load_daily_stats(db_path, db_mtime, start_date.isoformat(), end_date.isoformat())
+        if int(by_day["n_posts"].sum()) != total_posts:
+            by_day = None
+    if by_day is None:
+        by_day = (
+            filtered.groupby("day", as_index=False)
+            .agg(views=("views", "sum"), engagement_rate=("engagement_rate", "mean"))
+        )
+    by_day["engagement_rate_pct"] = by_day["engagement_rate"] * 100.0
 
-with left:
-    st.subheader("Views over time (Central Time)")
-    chart_df = filtered.copy()
-    chart_df["day"] = chart_df["created_at_local"].dt.date
-    by_day_views = chart_df.groupby("day", as_index=False)["views"].sum()
-    st.line_chart(by_day_views, x="day", y="views")
+    left, right = st.columns(2)
 
-with right:
-    st.subheader("Engagement rate over time (avg per day, Central Time)")
-    chart_df = filtered.copy()
-    chart_df["day"] = chart_df["created_at_local"].dt.date
-    by_day_er = chart_df.groupby("day", as_index=False)["engagement_rate"].mean()
-    by_day_er["engagement_rate_pct"] = by_day_er["engagement_rate"] * 100.0
-    st.line_chart(by_day_er, x="day", y="engagement_rate_pct")
+    with left:
+        st.subheader("Views over time (Central Time)")
+        st.line_chart(by_day, x="day", y="views")
 
-st.divider()
+    with right:
+        st.subheader("Engagement rate over time (avg per day, Central Time)")
+        st.line_chart(by_day, x="day", y="engagement_rate_pct")
 
-# Table
-st.subheader("Posts")
-show = filtered.sort_values("views", ascending=False).copy()
-show["created_at_central"] = show["created_at_local"].dt.strftime("%Y-%m-%d %H:%M")
-show["engagement_rate_pct"] = (show["engagement_rate"] * 100.0).round(2)
-
-show = show[
-    [
-        "post_id",
-        "created_at_central",
-        "views",
-        "likes",
-        "comments",
-        "shares",
-        "engagement",
-        "engagement_rate_pct",
-        "caption",
-        "url",
+else:
+    # Table
+    st.subheader("Posts")
+    # Already ordered by views (descending) in SQL
+    show = filtered.head(POSTS_TABLE_LIMIT)
+    if total_posts > POSTS_TABLE_LIMIT:
+        st.caption(f"Showing the top {fmt_int(POSTS_TABLE_LIMIT)} of {fmt_int(total_posts)} posts by views.")
+    show["created_at_central"] = show["created_at_local"].dt.strftime("%Y-%m-%d %H:%M")
+    show["engagement_rate_pct"] = (show["engagement_rate"] * 100.0).round(2)
+
+    show = show[
+        [
+            "post_id",
+            "created_at_central",
+            "views",
+            "likes",
+            "comments",
+            "shares",
+            "engagement",
+            "engagement_rate_pct",
+            "caption",
+            "url",
+        ]
     ]
-]
-st.dataframe(show, width="stretch", hide_index=True)
+    st.dataframe(show, width="stretch", hide_index=True)
+
+st.divider()
 
 # Recommendations
 st.subheader("Recommendations (simple heuristics)")
@@ -269,7 +452,7 @@ if median_views < 500:
     recs.append(
         "Median views are low. Run a 7-day posting experiment and test two posting times (morning vs evening)."
     )
-if int(filtered["shares"].sum()) == 0:
+if total_shares == 0:
     recs.append("Zero shares in this window. Try a direct prompt: 'Send this to someone who needs it.'")
 if total_posts < 5:
     recs.append("Not enough posts in the filtered window to trust patterns. Get 5-10 posts before changing strategy.")
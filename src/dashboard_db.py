@@ -0,0 +1,27 @@
+"""SQLite connection helper shared by the Streamlit dashboard pages."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import streamlit as st
+
+from src.db import apply_pragmas
+
+
+def get_conn(db_path: str) -> sqlite3.Connection:
+    """Return this session's SQLite connection, opening it on first use.
+
+    Streamlit reruns the script on a worker thread per interaction, so the
+    connection is kept in session state and opened with
+    ``check_same_thread=False`` to be shared across reruns. Rows are plain
+    tuples; callers that need name access set ``sqlite3.Row`` on their cursor.
+    """
+    key = f"_conn_{db_path}"
+    if key not in st.session_state:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        apply_pragmas(conn)
+        # Long-lived connection: let SQLite refresh planner stats where stale
+        conn.execute("PRAGMA optimize=0x10002;")
+        st.session_state[key] = conn
+    return st.session_state[key]
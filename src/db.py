@@ -2,28 +2,95 @@
 
 from __future__ import annotations
 
+import json
 import os
 import sqlite3
+import threading
+from collections.abc import Iterable, Mapping
 from datetime import datetime, timezone
+from itertools import islice
+from typing import Any
 
 DEFAULT_DB_PATH = "data/social.db"
 
+_local = threading.local()
+
 
 def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
 
 
+def get_db_mtime(db_path: str) -> int:
+    """Latest mtime (ns) of the DB file or its WAL sidecar; 0 if neither exists.
+
+    Committed writes land in the ``-wal`` file first, so cache keys built
+    from this change on every write.
+    """
+    mtimes = [0]
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return max(mtimes)
+
+
 def connect(db_path: str | None = None) -> sqlite3.Connection:
     if db_path is None:
         db_path = get_db_path()
     os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL;")
+    apply_pragmas(conn)
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
+def get_shared_connection(db_path: str | None = None) -> sqlite3.Connection:
+    """Return this thread's long-lived connection to *db_path*, opening it once.
+
+    For small helpers that would otherwise open and close a connection per
+    call. Callers must not close it.
+    """
+    if db_path is None:
+        db_path = get_db_path()
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = conns[db_path] = connect(db_path)
+    return conn
+
+
+def close_conn(conn: sqlite3.Connection) -> None:
+    """Run ``PRAGMA optimize`` and close *conn*.
+
+    Lets SQLite refresh planner stats for indexes this connection used;
+    usually a no-op. Optimize is best-effort and never blocks the close.
+    """
+    try:
+        conn.execute("PRAGMA optimize;")
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Apply the WAL + performance PRAGMAs used for long-lived connections.
+
+    NORMAL sync is durable under WAL; the 64MB page cache, in-memory temp
+    tables and 256MB mmap keep hot pages out of read() syscalls.
+    """
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA busy_timeout=5000;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")
+    conn.execute("PRAGMA mmap_size=268435456;")
+
+
 def now_utc() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -34,9 +101,149 @@ def init_schema(conn: sqlite3.Connection) -> None:
     # Migrations for existing databases
     _migrate_add_column(conn, "themes", "hook", "TEXT")
     _migrate_add_column(conn, "lineup_entries", "tiktok_post_id", "TEXT")
+    migrate_post_columns(conn)
+    # Date-window scans; carrying views covers the report's median and
+    # top-N lookups
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tiktok_posts_epoch_views "
+        "ON tiktok_posts(created_at_epoch, views)"
+    )
+    # Caption search index; populate it once from existing posts on creation
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'tiktok_posts_fts'"
+    ).fetchone()
+    conn.executescript(_CAPTION_FTS_SQL)
+    if not fts_exists:
+        conn.execute("INSERT INTO tiktok_posts_fts(tiktok_posts_fts) VALUES ('rebuild')")
+    # Summary triggers, plus a one-off backfill for rows written before they
+    # existed (re-running it would write, and bump the mtime cache keys)
+    triggers_exist = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+        f"AND name IN ({','.join('?' * len(_SUMMARY_TRIGGER_NAMES))})",
+        _SUMMARY_TRIGGER_NAMES,
+    ).fetchone()[0] == len(_SUMMARY_TRIGGER_NAMES)
+    conn.executescript(_SUMMARY_TRIGGERS_SQL)
+    if not triggers_exist:
+        for statements in _SUMMARY_REFRESH_SQL.values():
+            for stmt in statements:
+                conn.execute(stmt)
     conn.commit()
 
 
+def analyze(db_path: str | None = None) -> None:
+    """Run ANALYZE so the query planner has real statistics for the indexes."""
+    conn = connect(db_path)
+    try:
+        conn.execute("ANALYZE;")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def read_dashboard_summary(conn: sqlite3.Connection) -> dict[str, Any]:
+    """Return the trigger-maintained ``dashboard_summary`` rows as ``{key: value}``.
+
+    Values are JSON-decoded (``None`` for NULL). Returns ``{}`` when the table
+    does not exist yet, so callers can fall back to querying the source tables.
+    """
+    try:
+        rows = conn.execute("SELECT key, value FROM dashboard_summary").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {key: json.loads(value) if value is not None else None for key, value in rows}
+
+
+# Generated (computed) tiktok_posts columns: name -> column definition.
+# VIRTUAL so they can be added to existing tables with ALTER TABLE.
+POST_GENERATED_COLUMNS = {
+    # created_at as Unix seconds (UTC)
+    "created_at_epoch": (
+        "created_at_epoch INTEGER GENERATED ALWAYS AS "
+        "(CAST(strftime('%s', created_at) AS INTEGER)) VIRTUAL"
+    ),
+    "engagement": (
+        "engagement INTEGER GENERATED ALWAYS AS "
+        "(COALESCE(likes, 0) + COALESCE(comments, 0) + COALESCE(shares, 0)) VIRTUAL"
+    ),
+}
+
+_POST_COLUMNS = (
+    "post_id", "created_at", "views", "likes", "comments", "shares", "favorites",
+    "caption", "url", "raw_json",
+)
+
+# Upsert (not INSERT OR REPLACE) so rowids stay stable for tiktok_posts_fts
+UPSERT_POST_SQL = """
+INSERT INTO tiktok_posts (
+    post_id, created_at, views, likes, comments, shares, favorites,
+    caption, url, raw_json, updated_at
+) VALUES (
+    :post_id, :created_at, :views, :likes, :comments, :shares, :favorites,
+    :caption, :url, :raw_json, :updated_at
+)
+ON CONFLICT(post_id) DO UPDATE SET
+    created_at = excluded.created_at,
+    views      = excluded.views,
+    likes      = excluded.likes,
+    comments   = excluded.comments,
+    shares     = excluded.shares,
+    favorites  = excluded.favorites,
+    caption    = excluded.caption,
+    url        = excluded.url,
+    raw_json   = excluded.raw_json,
+    updated_at = excluded.updated_at
+;
+"""
+
+
+UPSERT_VERSE_SQL = """
+INSERT INTO bible_verses (reference, text, translation, theme_id, tone, created_at)
+VALUES (:reference, :text, :translation, :theme_id, :tone, :created_at)
+ON CONFLICT(theme_id, reference) DO UPDATE SET
+    text        = excluded.text,
+    translation = excluded.translation,
+    tone        = excluded.tone
+;
+"""
+
+
+def bulk_upsert_posts(
+    conn: sqlite3.Connection,
+    posts: Iterable[Mapping[str, Any]],
+    batch_size: int = 10_000,
+) -> int:
+    """Upsert *posts* into tiktok_posts with batched ``executemany``.
+
+    All batches run in one transaction, opened with ``BEGIN IMMEDIATE`` so
+    the write lock is taken up front rather than on the first insert.
+    Missing post fields are stored as NULL and every row gets the same
+    ``updated_at``. Returns the row count.
+    """
+    updated_at = now_utc()
+    params = (
+        {**{col: post.get(col) for col in _POST_COLUMNS}, "updated_at": updated_at}
+        for post in posts
+    )
+    count = 0
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    with conn:
+        while batch := list(islice(params, batch_size)):
+            conn.executemany(UPSERT_POST_SQL, batch)
+            count += len(batch)
+    return count
+
+
+def migrate_post_columns(conn: sqlite3.Connection) -> None:
+    """Add any missing POST_GENERATED_COLUMNS to an older tiktok_posts table."""
+    # table_xinfo, unlike table_info, lists generated columns
+    cur = conn.execute("PRAGMA table_xinfo(tiktok_posts)")
+    existing = {row[1] for row in cur.fetchall()}
+    for name, definition in POST_GENERATED_COLUMNS.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE tiktok_posts ADD COLUMN {definition}")
+
+
 def _migrate_add_column(
     conn: sqlite3.Connection, table: str, column: str, col_type: str
 ) -> None:
@@ -61,7 +268,15 @@ CREATE TABLE IF NOT EXISTS tiktok_posts (
     caption     TEXT,
     url         TEXT,
     raw_json    TEXT,
-    updated_at  TEXT
+    updated_at  TEXT,
+    -- Generated columns (see POST_GENERATED_COLUMNS); computed, so every
+    -- writer gets them
+    created_at_epoch INTEGER GENERATED ALWAYS AS (
+        CAST(strftime('%s', created_at) AS INTEGER)
+    ) VIRTUAL,
+    engagement  INTEGER GENERATED ALWAYS AS (
+        COALESCE(likes, 0) + COALESCE(comments, 0) + COALESCE(shares, 0)
+    ) VIRTUAL
 );
 CREATE INDEX IF NOT EXISTS idx_tiktok_posts_created_at
     ON tiktok_posts(created_at);
@@ -95,6 +310,10 @@ CREATE TABLE IF NOT EXISTS bible_verses (
 );
 CREATE INDEX IF NOT EXISTS idx_bible_verses_theme
     ON bible_verses(theme_id);
+CREATE INDEX IF NOT EXISTS idx_verses_theme_usage
+    ON bible_verses(theme_id, used_count, last_used_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bible_verses_theme_ref
+    ON bible_verses(theme_id, reference);
 
 -- Generated prayers
 CREATE TABLE IF NOT EXISTS prayers (
@@ -108,6 +327,12 @@ CREATE TABLE IF NOT EXISTS prayers (
     prompt_template     TEXT,
     created_at          TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_prayers_verse
+    ON prayers(verse_id);
+CREATE INDEX IF NOT EXISTS idx_prayers_theme
+    ON prayers(theme_id);
+CREATE INDEX IF NOT EXISTS idx_prayers_created_at
+    ON prayers(created_at);
 
 -- Audio files generated via ElevenLabs
 CREATE TABLE IF NOT EXISTS audio_files (
@@ -158,6 +383,10 @@ CREATE TABLE IF NOT EXISTS generated_videos (
     text_position   TEXT,
     created_at      TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_generated_videos_prayer
+    ON generated_videos(prayer_id);
+CREATE INDEX IF NOT EXISTS idx_generated_videos_created_at
+    ON generated_videos(created_at);
 
 -- Publishing queue and history
 CREATE TABLE IF NOT EXISTS publish_queue (
@@ -177,6 +406,11 @@ CREATE INDEX IF NOT EXISTS idx_publish_queue_status
     ON publish_queue(status);
 CREATE INDEX IF NOT EXISTS idx_publish_queue_scheduled
     ON publish_queue(scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_publish_queue_video
+    ON publish_queue(video_id);
+-- Covering index: newest-first scans read status without touching rows
+CREATE INDEX IF NOT EXISTS idx_publish_queue_updated_status
+    ON publish_queue(updated_at DESC, status);
 
 -- Configuration overrides from dashboard
 CREATE TABLE IF NOT EXISTS config_overrides (
@@ -201,6 +435,8 @@ CREATE TABLE IF NOT EXISTS test_runs (
     started_at      TEXT,
     completed_at    TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_test_runs_completed_at
+    ON test_runs(completed_at);
 
 -- Lineup entries (replaces YAML-based lineup)
 CREATE TABLE IF NOT EXISTS lineup_entries (
@@ -223,4 +459,119 @@ CREATE TABLE IF NOT EXISTS lineup_entries (
     updated_at      TEXT NOT NULL
 );
 CREATE INDEX IF NOT EXISTS idx_lineup_entries_status ON lineup_entries(status);
+
+-- Per-day post rollup (Central-time days), rebuilt by the CSV importer
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day         TEXT PRIMARY KEY,   -- YYYY-MM-DD, America/Chicago
+    views_sum   INTEGER,
+    eng_sum     INTEGER,
+    er_mean     REAL,
+    n_posts     INTEGER
+);
+
+-- Precomputed dashboard aggregates, kept current by triggers (see below)
+CREATE TABLE IF NOT EXISTS dashboard_summary (
+    key         TEXT PRIMARY KEY,
+    value       TEXT,           -- JSON
+    updated_at  TEXT
+);
 """
+
+# External-content FTS5 index over tiktok_posts.caption. The trigram
+# tokenizer keeps "caption contains" substring semantics (case-insensitive)
+# for search terms of three or more characters.
+_CAPTION_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tiktok_posts_fts USING fts5(
+    caption, content='tiktok_posts', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS trg_tiktok_posts_fts_insert
+    AFTER INSERT ON tiktok_posts
+BEGIN
+    INSERT INTO tiktok_posts_fts(rowid, caption) VALUES (new.rowid, new.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tiktok_posts_fts_delete
+    AFTER DELETE ON tiktok_posts
+BEGIN
+    INSERT INTO tiktok_posts_fts(tiktok_posts_fts, rowid, caption)
+        VALUES ('delete', old.rowid, old.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tiktok_posts_fts_update
+    AFTER UPDATE OF caption ON tiktok_posts
+BEGIN
+    INSERT INTO tiktok_posts_fts(tiktok_posts_fts, rowid, caption)
+        VALUES ('delete', old.rowid, old.caption);
+    INSERT INTO tiktok_posts_fts(rowid, caption) VALUES (new.rowid, new.caption);
+END;
+"""
+
+# Statements that recompute each dashboard_summary key, grouped by the
+# source table whose writes invalidate them.
+_SUMMARY_REFRESH_SQL: dict[str, tuple[str, ...]] = {
+    "publish_queue": (
+        """
+        INSERT OR REPLACE INTO dashboard_summary (key, value, updated_at)
+        SELECT 'pq_counts', json_group_object(status, cnt), CURRENT_TIMESTAMP
+        FROM (
+            SELECT status, COUNT(*) AS cnt FROM publish_queue
+            WHERE status IS NOT NULL GROUP BY status
+        );
+        """,
+        """
+        INSERT OR REPLACE INTO dashboard_summary (key, value, updated_at)
+        SELECT 'pq_recent_statuses', json_group_array(status), CURRENT_TIMESTAMP
+        FROM (
+            SELECT status FROM publish_queue ORDER BY updated_at DESC LIMIT 3
+        );
+        """,
+    ),
+    "test_runs": (
+        """
+        INSERT OR REPLACE INTO dashboard_summary (key, value, updated_at)
+        VALUES ('latest_run', (
+            SELECT json_object(
+                'id', id, 'run_id', run_id, 'status', status,
+                'tests_passed', tests_passed, 'tests_failed', tests_failed,
+                'tests_skipped', tests_skipped, 'duration_sec', duration_sec,
+                'commit_sha', commit_sha, 'branch', branch,
+                'started_at', started_at, 'completed_at', completed_at
+            )
+            FROM test_runs ORDER BY completed_at DESC LIMIT 1
+        ), CURRENT_TIMESTAMP);
+        """,
+    ),
+}
+
+_SUMMARY_EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+_SUMMARY_TRIGGER_NAMES = tuple(
+    f"trg_{table}_summary_{event.lower()}"
+    for table in _SUMMARY_REFRESH_SQL
+    for event in _SUMMARY_EVENTS
+)
+
+_SUMMARY_TRIGGERS_SQL = "\n".join(
+    f"CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_{event.lower()}\n"
+    f"    AFTER {event} ON {table}\nBEGIN\n{''.join(statements)}\nEND;"
+    for table, statements in _SUMMARY_REFRESH_SQL.items()
+    for event in _SUMMARY_EVENTS
+)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Maintenance entry point: ``python -m src.db analyze [db_path]``."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    analyze_cmd = sub.add_parser("analyze", help="Run ANALYZE on the database.")
+    analyze_cmd.add_argument("db_path", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "analyze":
+        db_path = args.db_path or get_db_path()
+        analyze(db_path)
+        print(f"Analyzed {db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,14 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from zoneinfo import ZoneInfo
 
-import pandas as pd
 import typer
 from rich.console import Console
-from rich.table import Table
 
 try:
     from dotenv import load_dotenv  # type: ignore
@@ -18,12 +19,37 @@ except Exception:
     # If python-dotenv is not installed, .env won't be auto-loaded.
     pass
 
-from dateutil import parser as dateparser  # type: ignore
+try:
+    import orjson  # type: ignore
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+except ImportError:
+    # Same compact, non-ASCII-escaping output as orjson, just slower
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+from src.db import (
+    POST_GENERATED_COLUMNS,
+    apply_pragmas,
+    bulk_upsert_posts,
+    close_conn,
+    migrate_post_columns,
+)
+
+# pandas/numpy/rich.table/dateutil are imported where used to keep CLI startup fast
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import numpy as np
+    import pandas as pd
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 console = Console()
 
 DEFAULT_DB_PATH = "data/social.db"
+# Calendar days for daily_stats; matches the dashboard's Central Time
+LOCAL_TZ = ZoneInfo("America/Chicago")
 
 POST_ID_KEYS = ["post_id", "id", "video_id", "item_id", "tiktok_id"]
 CREATED_AT_KEYS = ["create_time", "created_at", "created", "posted_at", "date", "timestamp"]
@@ -35,6 +61,12 @@ FAVORITES_KEYS = ["favorites", "favorite_count"]
 CAPTION_KEYS = ["caption", "description", "text"]
 URL_KEYS = ["url", "share_url", "link"]
 
+# Spaces and dashes in CSV headers become underscores (one str.translate pass)
+_COLUMN_SEPARATORS = str.maketrans({" ": "_", "-": "_"})
+
+# Rows per pd.read_csv chunk during import (matches bulk_upsert_posts batches)
+CSV_CHUNK_ROWS = 10_000
+
 
 def get_db_path() -> str:
     return os.getenv("DB_PATH", DEFAULT_DB_PATH)
@@ -43,14 +75,15 @@ def get_db_path() -> str:
 def connect(db_path: str) -> sqlite3.Connection:
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA journal_mode=WAL;")
+    # Same WAL/synchronous/cache/mmap tuning as the app's connections
+    apply_pragmas(conn)
     conn.execute("PRAGMA foreign_keys=ON;")
     return conn
 
 
-def init_db(conn: sqlite3.Connection) -> None:
+def init_tables(conn: sqlite3.Connection) -> None:
     conn.execute(
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS tiktok_posts (
             post_id     TEXT PRIMARY KEY,
             created_at  TEXT,
@@ -62,41 +95,44 @@ def init_db(conn: sqlite3.Connection) -> None:
             caption     TEXT,
             url         TEXT,
             raw_json    TEXT,
-            updated_at  TEXT
+            updated_at  TEXT,
+            {", ".join(POST_GENERATED_COLUMNS.values())}
         );
         """
     )
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_tiktok_posts_created_at ON tiktok_posts(created_at);")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day         TEXT PRIMARY KEY,
+            views_sum   INTEGER,
+            eng_sum     INTEGER,
+            er_mean     REAL,
+            n_posts     INTEGER
+        );
+        """
+    )
+    # Tables created before the generated columns existed
+    migrate_post_columns(conn)
     conn.commit()
 
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [
-        str(c).strip().lower().replace(" ", "_").replace("-", "_")
-        for c in df.columns
-    ]
-    return df
+def build_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tiktok_posts_created_at ON tiktok_posts(created_at);")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tiktok_posts_epoch_views ON tiktok_posts(created_at_epoch, views);"
+    )
+    conn.commit()
 
 
-def pick_first(row: Dict[str, Any], keys: list[str]) -> Optional[Any]:
-    for k in keys:
-        if k in row and row[k] not in (None, "", "nan", "NaN"):
-            return row[k]
-    return None
+def init_db(conn: sqlite3.Connection) -> None:
+    init_tables(conn)
+    build_indexes(conn)
 
 
-def to_int(value: Any) -> Optional[int]:
-    if value is None:
-        return None
-    s = str(value).strip()
-    if s == "":
-        return None
-    s = s.replace(",", "")
-    try:
-        return int(float(s))
-    except Exception:
-        return None
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [str(c).strip().lower().translate(_COLUMN_SEPARATORS) for c in df.columns]
+    return df
 
 
 def parse_datetime(value: Any) -> Optional[str]:
@@ -117,10 +153,21 @@ def parse_datetime(value: Any) -> Optional[str]:
         except Exception:
             pass
 
+    # ISO 8601 (the usual export format) parses in C; dateutil's tokenizer
+    # is only needed for free-form dates
     try:
-        dt = dateparser.parse(s)
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        from dateutil import parser as dateparser
+
+        try:
+            dt = dateparser.parse(s)
+        except Exception:
+            return None
         if dt is None:
             return None
+
+    try:
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
         else:
@@ -130,69 +177,70 @@ def parse_datetime(value: Any) -> Optional[str]:
         return None
 
 
-def upsert_post(conn: sqlite3.Connection, post: Dict[str, Any]) -> None:
-    now = datetime.now(timezone.utc).isoformat()
-    conn.execute(
-        """
-        INSERT INTO tiktok_posts (
-            post_id, created_at, views, likes, comments, shares, favorites,
-            caption, url, raw_json, updated_at
-        ) VALUES (
-            :post_id, :created_at, :views, :likes, :comments, :shares, :favorites,
-            :caption, :url, :raw_json, :updated_at
-        )
-        ON CONFLICT(post_id) DO UPDATE SET
-            created_at = excluded.created_at,
-            views      = excluded.views,
-            likes      = excluded.likes,
-            comments   = excluded.comments,
-            shares     = excluded.shares,
-            favorites  = excluded.favorites,
-            caption    = excluded.caption,
-            url        = excluded.url,
-            raw_json   = excluded.raw_json,
-            updated_at = excluded.updated_at
-        ;
-        """,
+def _first_present(df: pd.DataFrame, keys: list[str]) -> pd.Series:
+    """Per row, the first of *keys* with a usable value (else None)."""
+    import pandas as pd
+
+    out = pd.Series([None] * len(df), index=df.index, dtype=object)
+    for k in keys:
+        if k not in df.columns:
+            continue
+        col = df[k].astype(object)
+        usable = col.notna() & ~col.isin(["", "nan", "NaN"])
+        out = out.where(out.notna() | ~usable, col)
+        # Usually the first matching column is complete; skip the fallbacks
+        if out.notna().all():
+            break
+    return out
+
+
+def _to_int_column(values: pd.Series) -> np.ndarray:
+    """Python ints (commas stripped, fractions truncated), None where not a number."""
+    import numpy as np
+    import pandas as pd
+
+    text = values.astype(str).str.strip().str.replace(",", "", regex=False)
+    num = pd.to_numeric(text, errors="coerce")
+    num = num.where(np.isfinite(num))
+    return np.trunc(num).astype("Int64").to_numpy(dtype=object, na_value=None)
+
+
+def dataframe_to_posts(df: pd.DataFrame) -> pd.DataFrame:
+    """Map a normalized CSV frame to tiktok_posts rows, column-wise.
+
+    Returns one row per post with the tiktok_posts columns, ready for
+    bulk_upsert_posts. Rows without a post_id are dropped.
+    """
+    import numpy as np
+    import pandas as pd
+
+    post_id = _first_present(df, POST_ID_KEYS)
+    has_id = post_id.notna()
+    df = df.loc[has_id]
+    # Exports repeat timestamps heavily: parse each distinct value once
+    codes, uniques = pd.factorize(_first_present(df, CREATED_AT_KEYS), use_na_sentinel=False)
+    created_at = pd.Series(
+        np.array([parse_datetime(v) for v in uniques], dtype=object)[codes],
+        index=df.index,
+        dtype=object,
+    )
+    return pd.DataFrame(
         {
-            "post_id": post["post_id"],
-            "created_at": post.get("created_at"),
-            "views": post.get("views"),
-            "likes": post.get("likes"),
-            "comments": post.get("comments"),
-            "shares": post.get("shares"),
-            "favorites": post.get("favorites"),
-            "caption": post.get("caption"),
-            "url": post.get("url"),
-            "raw_json": post.get("raw_json"),
-            "updated_at": now,
+            "post_id": post_id.loc[has_id].astype(str).str.strip(),
+            "created_at": created_at,
+            "views": _to_int_column(_first_present(df, VIEWS_KEYS)),
+            "likes": _to_int_column(_first_present(df, LIKES_KEYS)),
+            "comments": _to_int_column(_first_present(df, COMMENTS_KEYS)),
+            "shares": _to_int_column(_first_present(df, SHARES_KEYS)),
+            "favorites": _to_int_column(_first_present(df, FAVORITES_KEYS)),
+            "caption": _first_present(df, CAPTION_KEYS),
+            "url": _first_present(df, URL_KEYS),
+            "raw_json": [_json_dumps(r) for r in df.to_dict(orient="records")],
         },
+        index=df.index,
     )
 
 
-def row_to_post(row: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
-    post_id = pick_first(row, POST_ID_KEYS)
-    if post_id is None:
-        return None, "Missing post_id (expected one of: post_id, id, video_id, item_id)."
-
-    created_raw = pick_first(row, CREATED_AT_KEYS)
-    created_at = parse_datetime(created_raw)
-
-    post = {
-        "post_id": str(post_id).strip(),
-        "created_at": created_at,
-        "views": to_int(pick_first(row, VIEWS_KEYS)),
-        "likes": to_int(pick_first(row, LIKES_KEYS)),
-        "comments": to_int(pick_first(row, COMMENTS_KEYS)),
-        "shares": to_int(pick_first(row, SHARES_KEYS)),
-        "favorites": to_int(pick_first(row, FAVORITES_KEYS)),
-        "caption": pick_first(row, CAPTION_KEYS),
-        "url": pick_first(row, URL_KEYS),
-        "raw_json": json.dumps(row, ensure_ascii=False),
-    }
-    return post, None
-
-
 @app.command()
 def doctor() -> None:
     """Sanity check: shows python path, DB path, and row count."""
@@ -208,7 +256,7 @@ def doctor() -> None:
         count = cur.fetchone()[0]
         console.print(f"[bold]Rows in tiktok_posts:[/bold] {count}")
     finally:
-        conn.close()
+        close_conn(conn)
 
 
 @app.command("import")
@@ -216,59 +264,182 @@ def import_csv(
     csv_path: str = typer.Argument(..., help="Path to TikTok export CSV, e.g. data/tiktok_posts.csv"),
 ) -> None:
     """Import TikTok posts CSV into SQLite with upsert on post_id."""
+    import pandas as pd
+
     db_path = get_db_path()
     conn = connect(db_path)
-    init_db(conn)
+    init_tables(conn)
 
     if not os.path.exists(csv_path):
         raise typer.BadParameter(f"CSV not found: {csv_path}")
 
-    df = pd.read_csv(csv_path, keep_default_na=False)
-    df = normalize_columns(df)
+    # First load into an empty table: insert everything, then build the
+    # secondary indexes once instead of maintaining them row by row
+    if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM tiktok_posts)").fetchone()[0]:
+        conn.execute("DROP INDEX IF EXISTS idx_tiktok_posts_created_at")
+        conn.execute("DROP INDEX IF EXISTS idx_tiktok_posts_epoch_views")
 
-    imported = 0
     skipped = 0
-    warnings = 0
 
-    with conn:
-        for _, r in df.iterrows():
-            row = {k: r[k] for k in df.columns}
-            post, err = row_to_post(row)
-            if err:
-                skipped += 1
-                warnings += 1
-                continue
-            upsert_post(conn, post)
-            imported += 1
+    def iter_posts():
+        nonlocal skipped
+        # dtype=str: no per-chunk type inference, and every chunk (and
+        # raw_json) sees cells exactly as exported
+        reader = pd.read_csv(
+            csv_path, dtype=str, keep_default_na=False, chunksize=CSV_CHUNK_ROWS
+        )
+        for chunk in reader:
+            chunk = normalize_columns(chunk)
+            posts = dataframe_to_posts(chunk)
+            skipped += len(chunk) - len(posts)
+            yield from posts.to_dict(orient="records")
+
+    try:
+        try:
+            # Memory stays bounded by the chunk size; all chunks share one
+            # transaction
+            imported = bulk_upsert_posts(conn, iter_posts())
+        finally:
+            # Also after a failed load, so the table is never left unindexed
+            build_indexes(conn)
+        # Fresh planner stats so report date windows pick the covering index
+        conn.execute("ANALYZE tiktok_posts;")
+        conn.commit()
+        refresh_daily_stats(conn)
+    finally:
+        close_conn(conn)
 
     console.print(f"[bold]Imported/upserted:[/bold] {imported}")
     console.print(f"[bold]Skipped:[/bold] {skipped}")
-    if warnings:
+    if skipped:
         console.print("[yellow]Note:[/yellow] Some rows were skipped, likely missing post_id. Fix your CSV export or column names.")
 
 
-def load_posts(conn: sqlite3.Connection) -> pd.DataFrame:
+_POST_ER_SQL = "CASE WHEN views > 0 THEN 1.0 * engagement / views ELSE 0.0 END"
+
+
+def summarize_posts(conn: sqlite3.Connection, since_epoch: Optional[int] = None) -> Dict[str, float]:
+    """Report summary of tiktok_posts, aggregated in SQLite.
+
+    Missing counts count as 0. With *since_epoch*, only posts created at or
+    after that Unix time are included.
+    """
+    where = "created_at_epoch >= :since" if since_epoch is not None else "1"
+    params = {"since": since_epoch}
+    row = conn.execute(
+        f"""
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(views), 0),
+            COALESCE(SUM(engagement), 0),
+            COALESCE(SUM(shares), 0),
+            COALESCE(AVG(COALESCE(views, 0)), 0.0),
+            COALESCE(AVG({_POST_ER_SQL}), 0.0)
+        FROM tiktok_posts
+        WHERE {where}
+        """,
+        params,
+    ).fetchone()
+    posts, total_views, total_eng, total_shares, avg_views, avg_er = row
+
+    # Median: average of the one or two middle values
+    median_views = 0.0
+    if posts:
+        median_views = conn.execute(
+            f"""
+            SELECT AVG(v) FROM (
+                SELECT COALESCE(views, 0) AS v FROM tiktok_posts
+                WHERE {where}
+                ORDER BY v
+                LIMIT 2 - :n % 2 OFFSET (:n - 1) / 2
+            )
+            """,
+            {**params, "n": posts},
+        ).fetchone()[0]
+
+    return {
+        "posts": posts,
+        "total_views": total_views,
+        "total_engagement": total_eng,
+        "total_shares": total_shares,
+        "avg_views": float(avg_views),
+        "median_views": float(median_views),
+        "avg_engagement_rate": float(avg_er),
+    }
+
+
+def top_posts_by_views(
+    conn: sqlite3.Connection, n: int, since_epoch: Optional[int] = None
+) -> pd.DataFrame:
+    """The *n* most viewed posts (optionally since *since_epoch*), with engagement_rate."""
+    import pandas as pd
+
+    where = "created_at_epoch >= :since" if since_epoch is not None else "1"
+    return pd.read_sql_query(
+        f"""
+        SELECT
+            post_id, created_at, COALESCE(views, 0) AS views, engagement,
+            {_POST_ER_SQL} AS engagement_rate, caption, url
+        FROM tiktok_posts
+        WHERE {where}
+        ORDER BY views DESC, post_id
+        LIMIT :n
+        """,
+        conn,
+        params={"since": since_epoch, "n": n},
+    )
+
+
+def refresh_daily_stats(conn: sqlite3.Connection) -> int:
+    """Rebuild daily_stats from tiktok_posts. Returns the number of days.
+
+    Covers the same rows the dashboard loads with no filters (every dated
+    post, NULL views counting as 0) so it can stand in for the chart groupby.
+    """
+    import pandas as pd
+
     df = pd.read_sql_query(
         """
-        SELECT
-            post_id, created_at, views, likes, comments, shares, favorites, caption, url
+        SELECT created_at_epoch, COALESCE(views, 0) AS views, engagement
         FROM tiktok_posts
+        WHERE created_at_epoch IS NOT NULL
         """,
         conn,
     )
-    if "created_at" in df.columns:
-        df["created_at_dt"] = pd.to_datetime(df["created_at"], errors="coerce", utc=True)
-    else:
-        df["created_at_dt"] = pd.NaT
-    for col in ["views", "likes", "comments", "shares", "favorites"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
-    df["engagement"] = df["likes"] + df["comments"] + df["shares"]
-    df["engagement_rate"] = df.apply(lambda x: (x["engagement"] / x["views"]) if x["views"] > 0 else 0.0, axis=1)
-    return df
+    day = (
+        pd.to_datetime(df["created_at_epoch"], unit="s", utc=True)
+        .dt.tz_convert(LOCAL_TZ)
+        .dt.strftime("%Y-%m-%d")
+    )
+    views = df["views"]
+    stats = (
+        df.assign(
+            day=day,
+            engagement_rate=(df["engagement"] / views.where(views > 0)).fillna(0.0),
+        )
+        .groupby("day")
+        .agg(
+            views_sum=("views", "sum"),
+            eng_sum=("engagement", "sum"),
+            er_mean=("engagement_rate", "mean"),
+            n_posts=("views", "size"),
+        )
+    )
+    with conn:
+        conn.execute("DELETE FROM daily_stats")
+        conn.executemany(
+            "INSERT INTO daily_stats (day, views_sum, eng_sum, er_mean, n_posts) VALUES (?, ?, ?, ?, ?)",
+            [
+                (d, int(v), int(e), float(r), int(n))
+                for d, v, e, r, n in stats.itertuples(name=None)
+            ],
+        )
+    return len(stats)
 
 
 def print_top_posts(df: pd.DataFrame, title: str, n: int = 5) -> None:
+    from rich.table import Table
+
     table = Table(title=title)
     table.add_column("post_id", overflow="fold")
     table.add_column("created_at", overflow="fold")
@@ -297,16 +468,23 @@ def report(
     top_n: int = typer.Option(5, help="How many top posts to show"),
 ) -> None:
     """Generate a simple performance report from SQLite."""
+    from rich.table import Table
+
     db_path = get_db_path()
     conn = connect(db_path)
     init_db(conn)
 
+    cutoff = int((datetime.now(timezone.utc) - timedelta(days=last_days)).timestamp())
     try:
-        df = load_posts(conn)
+        s_all = summarize_posts(conn)
+        s_recent = summarize_posts(conn, since_epoch=cutoff)
+        # Summarize recent posts, or all time when the window is empty
+        since = cutoff if s_recent["posts"] else None
+        top = top_posts_by_views(conn, top_n, since_epoch=since)
     finally:
-        conn.close()
+        close_conn(conn)
 
-    total_posts = len(df)
+    total_posts = s_all["posts"]
     console.print(f"[bold]Total posts in DB:[/bold] {total_posts}")
 
     if total_posts == 0:
@@ -314,75 +492,74 @@ def report(
         console.print("Example: python -m src.main import data/tiktok_posts.csv")
         raise typer.Exit(code=0)
 
-    cutoff = datetime.now(timezone.utc) - timedelta(days=last_days)
-    recent = df[df["created_at_dt"].notna() & (df["created_at_dt"] >= cutoff)]
-
-    console.print(f"[bold]Posts in last {last_days} days:[/bold] {len(recent)}")
-
-    # Show summary for recent posts
-    frame = recent if len(recent) > 0 else df
-    label = f"Last {last_days} days" if len(recent) > 0 else "All time"
-
-    if len(frame) > 0:
-        total_views = int(frame["views"].sum())
-        total_eng = int(frame["engagement"].sum())
-        avg_views = float(frame["views"].mean())
-        med_views = float(frame["views"].median())
-        avg_er = float(frame["engagement_rate"].mean()) * 100.0
-
-        table = Table(title=f"{label} summary")
-        table.add_column("metric")
-        table.add_column("value", justify="right")
-        table.add_row("total_views", str(total_views))
-        table.add_row("total_engagement", str(total_eng))
-        table.add_row("avg_views", f"{avg_views:.1f}")
-        table.add_row("median_views", f"{med_views:.1f}")
-        table.add_row("avg_engagement_rate", f"{avg_er:.2f}%")
-        console.print(table)
+    console.print(f"[bold]Posts in last {last_days} days:[/bold] {s_recent['posts']}")
 
-        # Recommendations
-        recs = []
-        if avg_er < 2.0:
-            recs.append("Engagement rate is low. Try stronger hooks in first 1-2 seconds.")
-        if med_views < 500:
-            recs.append("Median views are low. Test different posting times.")
-        if frame["shares"].sum() == 0:
-            recs.append("No shares recorded. Add prompts like 'Send this to someone who needs it'.")
+    summary = s_recent if s_recent["posts"] else s_all
+    label = f"Last {last_days} days" if s_recent["posts"] else "All time"
 
-        if recs:
-            console.print("[bold]Recommendations:[/bold]")
-            for r in recs:
-                console.print(f"- {r}")
+    avg_er = summary["avg_engagement_rate"] * 100.0
+    med_views = summary["median_views"]
+
+    table = Table(title=f"{label} summary")
+    table.add_column("metric")
+    table.add_column("value", justify="right")
+    table.add_row("total_views", str(int(summary["total_views"])))
+    table.add_row("total_engagement", str(int(summary["total_engagement"])))
+    table.add_row("avg_views", f"{summary['avg_views']:.1f}")
+    table.add_row("median_views", f"{med_views:.1f}")
+    table.add_row("avg_engagement_rate", f"{avg_er:.2f}%")
+    console.print(table)
+
+    # Recommendations
+    recs = []
+    if avg_er < 2.0:
+        recs.append("Engagement rate is low. Try stronger hooks in first 1-2 seconds.")
+    if med_views < 500:
+        recs.append("Median views are low. Test different posting times.")
+    if summary["total_shares"] == 0:
+        recs.append("No shares recorded. Add prompts like 'Send this to someone who needs it'.")
+
+    if recs:
+        console.print("[bold]Recommendations:[/bold]")
+        for r in recs:
+            console.print(f"- {r}")
 
     # Show top posts
-    print_top_posts(frame, "Top posts (by views)", n=top_n)
+    print_top_posts(top, "Top posts (by views)", n=top_n)
+
 
+def _markdown_column(values: pd.Series, column: str) -> pd.Series:
+    """Format one column as escaped markdown cell text ("" for missing)."""
+    import pandas as pd
 
-def _markdown_escape(s: str) -> str:
-    return s.replace("|", r"\|").replace("\n", " ").strip()
+    if pd.api.types.is_float_dtype(values):
+        fmt = "{:.4f}" if column == "engagement_rate" else "{:.2f}"
+        return values.map(fmt.format, na_action="ignore").astype(object).fillna("")
+    text = values.astype(object).where(values.notna(), "").astype(str)
+    return (
+        text.str.replace("|", r"\|", regex=False)
+        .str.replace("\n", " ", regex=False)
+        .str.strip()
+    )
 
 
 def _df_to_markdown_table(df: pd.DataFrame, columns: list[str]) -> str:
+    import pandas as pd
+
     if df.empty:
         return "_No rows to display._\n"
 
     header = "| " + " | ".join(columns) + " |"
     sep = "| " + " | ".join(["---"] * len(columns)) + " |"
 
-    rows = []
-    for _, r in df.iterrows():
-        vals = []
-        for c in columns:
-            v = r.get(c, "")
-            if pd.isna(v):
-                v = ""
-            if isinstance(v, float):
-                vals.append(f"{v:.4f}" if c == "engagement_rate" else f"{v:.2f}")
-            else:
-                vals.append(_markdown_escape(str(v)))
-        rows.append("| " + " | ".join(vals) + " |")
+    # Format column by column, then join the cells of every row at once
+    cells = [
+        _markdown_column(df[c], c) if c in df.columns else pd.Series("", index=df.index)
+        for c in columns
+    ]
+    rows = "| " + cells[0].str.cat(cells[1:], sep=" | ") + " |"
 
-    return "\n".join([header, sep] + rows) + "\n"
+    return "\n".join([header, sep, *rows]) + "\n"
 
 
 @app.command()
@@ -396,13 +573,18 @@ def export(
     conn = connect(db_path)
     init_db(conn)
 
+    now = datetime.now(timezone.utc)
+    cutoff = int((now - timedelta(days=last_days)).timestamp())
     try:
-        df = load_posts(conn)
+        s_all = summarize_posts(conn)
+        s_recent = summarize_posts(conn, since_epoch=cutoff)
+        top_df = top_posts_by_views(
+            conn, top_n, since_epoch=cutoff if s_recent["posts"] else None
+        )
     finally:
-        conn.close()
+        close_conn(conn)
 
-    total_posts = len(df)
-    now = datetime.now(timezone.utc)
+    total_posts = s_all["posts"]
 
     if total_posts == 0:
         md = "\n".join(
@@ -420,42 +602,11 @@ def export(
             ]
         )
     else:
-        cutoff = now - timedelta(days=last_days)
-        recent = df[df["created_at_dt"].notna() & (df["created_at_dt"] >= cutoff)].copy()
-
-        def summarize(frame: pd.DataFrame) -> dict[str, float]:
-            if frame.empty:
-                return {
-                    "posts": 0,
-                    "total_views": 0,
-                    "total_engagement": 0,
-                    "avg_views": 0,
-                    "median_views": 0,
-                    "avg_engagement_rate": 0,
-                }
-            return {
-                "posts": float(len(frame)),
-                "total_views": float(frame["views"].sum()),
-                "total_engagement": float(frame["engagement"].sum()),
-                "avg_views": float(frame["views"].mean()),
-                "median_views": float(frame["views"].median()),
-                "avg_engagement_rate": float(frame["engagement_rate"].mean()) * 100.0,
-            }
-
-        s_all = summarize(df)
-        s_recent = summarize(recent)
-
-        def top_posts(frame: pd.DataFrame) -> pd.DataFrame:
-            if frame.empty:
-                return frame
-            out_df = frame.sort_values("views", ascending=False).head(top_n).copy()
-            out_df["engagement_rate"] = out_df["engagement_rate"].apply(lambda x: x * 100.0)
-            out_df["caption"] = out_df["caption"].fillna("").astype(str).str.slice(0, 80)
-            return out_df[
-                ["post_id", "created_at", "views", "engagement", "engagement_rate", "caption", "url"]
-            ]
+        for summary in (s_all, s_recent):
+            summary["avg_engagement_rate"] *= 100.0
 
-        top_df = top_posts(recent if len(recent) else df)
+        top_df["engagement_rate"] *= 100.0
+        top_df["caption"] = top_df["caption"].fillna("").astype(str).str.slice(0, 80)
 
         md_lines = [
             "# TikTok Report",
@@ -511,13 +662,15 @@ def init_db_cmd() -> None:
     db_path = get_db_path()
     conn = db_connect(db_path)
     init_schema(conn)
-    conn.close()
+    close_conn(conn)
     console.print(f"[bold]Schema initialized:[/bold] {db_path}")
 
 
 @app.command("config-show")
 def config_show() -> None:
     """Display current configuration (YAML defaults + DB overrides)."""
+    from rich.table import Table
+
     from src.config import flatten_config, load_config
 
     config = load_config()
@@ -534,6 +687,8 @@ def config_show() -> None:
 @app.command("list-themes")
 def list_themes() -> None:
     """List all available content themes from the database."""
+    from rich.table import Table
+
     from src.db import connect as db_connect
     from src.db import init_schema
 
@@ -545,7 +700,7 @@ def list_themes() -> None:
         "SELECT slug, name, tone, is_active FROM themes ORDER BY slug"
     )
     rows = cur.fetchall()
-    conn.close()
+    close_conn(conn)
 
     if not rows:
         console.print(
@@ -576,6 +731,7 @@ def init_themes_cmd(
     """Load themes from YAML into the database (upsert on slug)."""
     import yaml as _yaml
 
+    from src.content.themes import clear_active_themes_cache
     from src.db import connect as db_connect
     from src.db import init_schema, now_utc
 
@@ -627,7 +783,8 @@ def init_themes_cmd(
             )
             imported += 1
 
-    conn.close()
+    close_conn(conn)
+    clear_active_themes_cache()
     console.print(f"[bold]Themes upserted:[/bold] {imported}")
 
 
@@ -640,8 +797,8 @@ def import_verses_cmd(
     """Import Bible verses from YAML into the database."""
     import yaml as _yaml
 
+    from src.db import UPSERT_VERSE_SQL, init_schema, now_utc
     from src.db import connect as db_connect
-    from src.db import init_schema, now_utc
 
     if not os.path.exists(yaml_path):
         raise typer.BadParameter(f"File not found: {yaml_path}")
@@ -662,55 +819,36 @@ def import_verses_cmd(
     cur = conn.execute("SELECT id, slug FROM themes")
     theme_map = {row["slug"]: row["id"] for row in cur.fetchall()}
 
-    imported = 0
     skipped = 0
     now = now_utc()
+    params = []
+    for v in verses:
+        theme_slug = v.get("theme", "")
+        theme_id = theme_map.get(theme_slug)
+        if theme_id is None:
+            console.print(
+                f"[yellow]Skipping verse {v['reference']}: "
+                f"theme '{theme_slug}' not in DB.[/yellow]"
+            )
+            skipped += 1
+            continue
+        params.append(
+            {
+                "reference": v["reference"],
+                "text": v["text"],
+                "translation": v.get("translation", "ESV"),
+                "theme_id": theme_id,
+                "tone": v.get("tone", ""),
+                "created_at": now,
+            }
+        )
 
+    # Upsert on (theme_id, reference): existing verses keep their id and usage
     with conn:
-        for v in verses:
-            theme_slug = v.get("theme", "")
-            theme_id = theme_map.get(theme_slug)
-            if theme_id is None:
-                console.print(
-                    f"[yellow]Skipping verse {v['reference']}: "
-                    f"theme '{theme_slug}' not in DB.[/yellow]"
-                )
-                skipped += 1
-                continue
-
-            # Check if verse already exists (by reference + theme)
-            existing = conn.execute(
-                "SELECT id FROM bible_verses WHERE reference = ? AND theme_id = ?",
-                (v["reference"], theme_id),
-            ).fetchone()
-
-            if existing:
-                conn.execute(
-                    """
-                    UPDATE bible_verses
-                    SET text = ?, translation = ?, tone = ?
-                    WHERE id = ?
-                    """,
-                    (v["text"], v.get("translation", "ESV"), v.get("tone", ""), existing["id"]),
-                )
-            else:
-                conn.execute(
-                    """
-                    INSERT INTO bible_verses (reference, text, translation, theme_id, tone, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        v["reference"],
-                        v["text"],
-                        v.get("translation", "ESV"),
-                        theme_id,
-                        v.get("tone", ""),
-                        now,
-                    ),
-                )
-            imported += 1
+        conn.executemany(UPSERT_VERSE_SQL, params)
+    imported = len(params)
 
-    conn.close()
+    close_conn(conn)
     console.print(f"[bold]Verses imported/updated:[/bold] {imported}")
     if skipped:
         console.print(f"[yellow]Skipped:[/yellow] {skipped} (missing theme)")
@@ -750,7 +888,7 @@ def generate_cmd(
     # 1. Pick theme
     chosen_theme = pick_theme(conn, slug=theme)
     if chosen_theme is None:
-        conn.close()
+        close_conn(conn)
         if theme:
             console.print(f"[red]Theme '{theme}' not found or inactive.[/red]")
         else:
@@ -764,7 +902,7 @@ def generate_cmd(
     # 2. Pick verse
     verse = pick_verse(conn, chosen_theme["id"])
     if verse is None:
-        conn.close()
+        close_conn(conn)
         console.print(
             f"[red]No verses found for theme '{chosen_theme['slug']}'.[/red] "
             "Run: python -m src.main import-verses"
@@ -795,19 +933,72 @@ def generate_cmd(
     if dry_run:
         console.print("\n[yellow]--dry-run: nothing saved.[/yellow]")
     else:
-        prayer_id = save_prayer(
-            conn, verse["id"], chosen_theme["id"], prayer_text, ai_model_used
-        )
-        mark_verse_used(conn, verse["id"])
+        # Prayer + verse usage land in one transaction
+        with conn:
+            prayer_id = save_prayer(
+                conn, verse["id"], chosen_theme["id"], prayer_text, ai_model_used,
+                commit=False,
+            )
+            mark_verse_used(conn, verse["id"], commit=False)
         console.print(f"\n[bold]Saved:[/bold] prayer_id={prayer_id}")
 
-    conn.close()
+    close_conn(conn)
 
 
 # ---------------------------------------------------------------------------
 # Phase 3 commands: media pipeline
 # ---------------------------------------------------------------------------
 
+@contextmanager
+def _footage_prefetch(
+    theme: Mapping[str, Any], db_path: str | None
+) -> Iterator[tuple[list[str], Future]]:
+    """Search and download *theme*'s footage on a worker thread.
+
+    Yields ``(keywords, future)`` so the body (TTS) overlaps with the
+    downloads. If the body raises, the fetch is cancelled or waited for and
+    any clip it downloaded that no stock_footage row records is deleted.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.media.footage import fetch_footage
+
+    keywords = json.loads(theme["keywords"]) if theme["keywords"] else []
+    if not keywords:
+        keywords = [theme["name"]]
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(fetch_footage, keywords, theme["slug"], db_path)
+        try:
+            yield keywords, future
+        except BaseException:
+            if not future.cancel():
+                _discard_unrecorded_footage(future, db_path)
+            raise
+
+
+def _discard_unrecorded_footage(future: Future, db_path: str | None) -> None:
+    """Delete clips from a finished fetch that no stock_footage row records."""
+    from src.db import connect as db_connect
+
+    try:
+        downloads = future.result()
+    except Exception:
+        return  # search/download failed; no paths were reported
+    conn = db_connect(db_path)
+    try:
+        for _, path in downloads:
+            recorded = conn.execute(
+                "SELECT 1 FROM stock_footage WHERE download_path = ? LIMIT 1", (path,)
+            ).fetchone()
+            if not recorded:  # clips reused from earlier videos are recorded
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    finally:
+        close_conn(conn)
+
+
 @app.command("compose")
 def compose_cmd(
     prayer_id: int = typer.Argument(..., help="ID of the prayer to compose into a video."),
@@ -828,7 +1019,7 @@ def compose_cmd(
         "SELECT * FROM prayers WHERE id = ?", (prayer_id,)
     ).fetchone()
     if not prayer_row:
-        conn.close()
+        close_conn(conn)
         console.print(f"[red]Prayer id={prayer_id} not found.[/red]")
         raise typer.Exit(code=1)
 
@@ -849,56 +1040,44 @@ def compose_cmd(
         console.print("  2. Search & download stock footage")
         console.print("  3. Compose video with FFmpeg")
         console.print("\n[yellow]--dry-run: no media generated.[/yellow]")
-        conn.close()
+        close_conn(conn)
         return
 
-    # 2. Generate audio
-    console.print("\n[bold]Step 1:[/bold] Generating audio...")
+    from src.media.footage import save_footage_records
     from src.media.tts import generate_audio, save_audio_record
 
-    try:
-        audio_info = generate_audio(prayer_id, prayer_row["prayer_text"], db_path, voice_id=dict(theme_row).get("voice_id"))
-        audio_id = save_audio_record(conn, prayer_id, audio_info)
-        console.print(f"  Audio saved: {audio_info['file_path']}")
-    except RuntimeError as exc:
-        conn.close()
-        console.print(f"  [red]{exc}[/red]")
-        raise typer.Exit(code=1)
+    # Footage search/download doesn't depend on the audio; it runs alongside
+    # TTS and is collected at step 2
+    with _footage_prefetch(theme_row, db_path) as (keywords, footage_future):
+        # 2. Generate audio
+        console.print("\n[bold]Step 1:[/bold] Generating audio...")
+        try:
+            audio_info = generate_audio(prayer_id, prayer_row["prayer_text"], db_path, voice_id=dict(theme_row).get("voice_id"))
+            audio_id = save_audio_record(conn, prayer_id, audio_info)
+            console.print(f"  Audio saved: {audio_info['file_path']}")
+        except RuntimeError as exc:
+            close_conn(conn)
+            console.print(f"  [red]{exc}[/red]")
+            raise typer.Exit(code=1)
 
     # 3. Fetch stock footage
     console.print("\n[bold]Step 2:[/bold] Searching for stock footage...")
-    from src.media.footage import (
-        download_clip,
-        save_footage_record,
-        search_footage,
-    )
-
-    keywords = json.loads(theme_row["keywords"]) if theme_row["keywords"] else []
-    if not keywords:
-        keywords = [theme_row["name"]]
-
     try:
-        clips = search_footage(keywords, db_path, max_results=2)
+        downloads = footage_future.result()
     except RuntimeError as exc:
-        conn.close()
+        close_conn(conn)
         console.print(f"  [red]{exc}[/red]")
         raise typer.Exit(code=1)
 
-    if not clips:
-        conn.close()
+    if not downloads:
+        close_conn(conn)
         console.print("  [red]No footage found. Check API keys.[/red]")
         raise typer.Exit(code=1)
 
-    footage_paths: list[str] = []
-    footage_ids: list[int] = []
-    for clip in clips:
-        dl_path = download_clip(clip, theme_row["slug"])
-        fid = save_footage_record(
-            conn, clip, str(dl_path), theme_row["id"], keywords
-        )
-        footage_paths.append(str(dl_path))
-        footage_ids.append(fid)
-        console.print(f"  Downloaded: {dl_path.name}")
+    footage_paths = [path for _, path in downloads]
+    for path in footage_paths:
+        console.print(f"  Downloaded: {os.path.basename(path)}")
+    footage_ids = save_footage_records(conn, downloads, theme_row["id"], keywords)
 
     # 4. Compose video
     console.print("\n[bold]Step 3:[/bold] Composing video with FFmpeg...")
@@ -926,11 +1105,11 @@ def compose_cmd(
         )
         console.print(f"\n[bold]Done![/bold] video_id={video_id}")
     except RuntimeError as exc:
-        conn.close()
+        close_conn(conn)
         console.print(f"  [red]{exc}[/red]")
         raise typer.Exit(code=1)
 
-    conn.close()
+    close_conn(conn)
 
 
 # ---------------------------------------------------------------------------
@@ -959,7 +1138,7 @@ def schedule_cmd(
         "SELECT id, file_path FROM generated_videos WHERE id = ?", (video_id,)
     ).fetchone()
     if not video:
-        conn.close()
+        close_conn(conn)
         console.print(f"[red]Video id={video_id} not found.[/red]")
         raise typer.Exit(code=1)
 
@@ -975,7 +1154,7 @@ def schedule_cmd(
             "Run: python -m src.main approve " + str(queue_id)
         )
 
-    conn.close()
+    close_conn(conn)
 
 
 @app.command("approve")
@@ -998,7 +1177,7 @@ def approve_cmd(
             f"[yellow]queue_id={queue_id} not found or not in 'pending' status.[/yellow]"
         )
 
-    conn.close()
+    close_conn(conn)
 
 
 @app.command("publish")
@@ -1044,7 +1223,7 @@ def publish_cmd(
                 f"  [yellow]Skipped[/yellow] queue_id={qid}: {r.get('reason', '?')}"
             )
 
-    conn.close()
+    close_conn(conn)
 
 
 @app.command("list-queue")
@@ -1055,6 +1234,8 @@ def list_queue_cmd(
     limit: int = typer.Option(20, "--limit", "-n", help="Max rows to show."),
 ) -> None:
     """Show the publish queue."""
+    from rich.table import Table
+
     from src.db import connect as db_connect
     from src.db import init_schema
     from src.publishing.scheduler import get_queue
@@ -1064,7 +1245,7 @@ def list_queue_cmd(
     init_schema(conn)
 
     items = get_queue(conn, status=status, limit=limit)
-    conn.close()
+    close_conn(conn)
 
     if not items:
         console.print("[yellow]Queue is empty.[/yellow]")
@@ -1152,7 +1333,7 @@ def generate_daily_cmd(
         ).fetchone()
 
         if row is None:
-            conn.close()
+            close_conn(conn)
             console.print(
                 "[yellow]No pending lineup entries.[/yellow] "
                 "Run: python -m src.main preview-lineup --count 7"
@@ -1172,7 +1353,7 @@ def generate_daily_cmd(
     # 1. Pick theme
     chosen_theme = pick_theme(conn, slug=theme)
     if chosen_theme is None:
-        conn.close()
+        close_conn(conn)
         if theme:
             console.print(f"[red]Theme '{theme}' not found or inactive.[/red]")
         else:
@@ -1197,7 +1378,7 @@ def generate_daily_cmd(
     if verse is None:
         verse = pick_verse(conn, chosen_theme["id"])
     if verse is None:
-        conn.close()
+        close_conn(conn)
         console.print(
             f"[red]No verses found for theme '{chosen_theme['slug']}'.[/red] "
             "Run: python -m src.main import-verses"
@@ -1233,66 +1414,56 @@ def generate_daily_cmd(
 
     if dry_run:
         console.print("\n[yellow]--dry-run: nothing saved or generated.[/yellow]")
-        conn.close()
+        close_conn(conn)
         return
 
     # 4. Save prayer
-    prayer_id = save_prayer(
-        conn, verse["id"], chosen_theme["id"], prayer_text, ai_model_used
-    )
-    mark_verse_used(conn, verse["id"])
+    with conn:
+        prayer_id = save_prayer(
+            conn, verse["id"], chosen_theme["id"], prayer_text, ai_model_used,
+            commit=False,
+        )
+        mark_verse_used(conn, verse["id"], commit=False)
     console.print(f"\n[bold]Saved:[/bold] prayer_id={prayer_id}")
 
-    # 5. Generate audio
-    console.print("\n[bold]Step 1:[/bold] Generating audio...")
+    from src.media.footage import save_footage_records
     from src.media.tts import generate_audio, save_audio_record
 
-    theme_voice_id = chosen_theme.get("voice_id")
-    try:
-        audio_info = generate_audio(prayer_id, prayer_text, db_path, voice_id=theme_voice_id)
-        audio_id = save_audio_record(conn, prayer_id, audio_info)
-        console.print(f"  Audio saved: {audio_info['file_path']}")
-        if theme_voice_id:
-            console.print(f"  Voice: {theme_voice_id}")
-    except RuntimeError as exc:
-        conn.close()
-        console.print(f"  [red]{exc}[/red]")
-        raise typer.Exit(code=1)
+    # Footage search/download doesn't depend on the audio; it runs alongside
+    # TTS and is collected at step 6
+    with _footage_prefetch(chosen_theme, db_path) as (keywords, footage_future):
+        # 5. Generate audio
+        console.print("\n[bold]Step 1:[/bold] Generating audio...")
+        theme_voice_id = chosen_theme.get("voice_id")
+        try:
+            audio_info = generate_audio(prayer_id, prayer_text, db_path, voice_id=theme_voice_id)
+            audio_id = save_audio_record(conn, prayer_id, audio_info)
+            console.print(f"  Audio saved: {audio_info['file_path']}")
+            if theme_voice_id:
+                console.print(f"  Voice: {theme_voice_id}")
+        except RuntimeError as exc:
+            close_conn(conn)
+            console.print(f"  [red]{exc}[/red]")
+            raise typer.Exit(code=1)
 
     # 6. Fetch stock footage
     console.print("\n[bold]Step 2:[/bold] Searching for stock footage...")
-    from src.media.footage import (
-        download_clip,
-        save_footage_record,
-        search_footage,
-    )
-
-    keywords = json.loads(chosen_theme["keywords"]) if chosen_theme["keywords"] else []
-    if not keywords:
-        keywords = [chosen_theme["name"]]
-
     try:
-        clips = search_footage(keywords, db_path, max_results=2)
+        downloads = footage_future.result()
     except RuntimeError as exc:
-        conn.close()
+        close_conn(conn)
         console.print(f"  [red]{exc}[/red]")
         raise typer.Exit(code=1)
 
-    if not clips:
-        conn.close()
+    if not downloads:
+        close_conn(conn)
         console.print("  [red]No footage found. Check API keys.[/red]")
         raise typer.Exit(code=1)
 
-    footage_paths: list[str] = []
-    footage_ids: list[int] = []
-    for clip in clips:
-        dl_path = download_clip(clip, chosen_theme["slug"])
-        fid = save_footage_record(
-            conn, clip, str(dl_path), chosen_theme["id"], keywords
-        )
-        footage_paths.append(str(dl_path))
-        footage_ids.append(fid)
-        console.print(f"  Downloaded: {dl_path.name}")
+    footage_paths = [path for _, path in downloads]
+    for path in footage_paths:
+        console.print(f"  Downloaded: {os.path.basename(path)}")
+    footage_ids = save_footage_records(conn, downloads, chosen_theme["id"], keywords)
 
     # 7. Compose video
     console.print("\n[bold]Step 3:[/bold] Composing video with FFmpeg...")
@@ -1326,7 +1497,7 @@ def generate_daily_cmd(
         )
         console.print(f"\n[bold]Done![/bold] video_id={video_id}")
     except RuntimeError as exc:
-        conn.close()
+        close_conn(conn)
         console.print(f"  [red]{exc}[/red]")
         raise typer.Exit(code=1)
 
@@ -1346,7 +1517,7 @@ def generate_daily_cmd(
             f"  Lineup entry {lineup_entry_id} marked as generated."
         )
 
-    conn.close()
+    close_conn(conn)
 
 
 @app.command("preview-lineup")
@@ -1359,6 +1530,8 @@ def preview_lineup_cmd(
     ),
 ) -> None:
     """Preview and save the next N posts to the lineup_entries table."""
+    from rich.table import Table
+
     from src.content.verses import pick_verse
     from src.db import connect as db_connect
     from src.db import init_schema, now_utc
@@ -1373,7 +1546,7 @@ def preview_lineup_cmd(
         rows = conn.execute(
             "SELECT * FROM lineup_entries ORDER BY post_number"
         ).fetchall()
-        conn.close()
+        close_conn(conn)
 
         if not rows:
             console.print(
@@ -1408,7 +1581,7 @@ def preview_lineup_cmd(
 
     all_themes = get_active_themes(conn)
     if not all_themes:
-        conn.close()
+        close_conn(conn)
         console.print("[red]No active themes available.[/red]")
         raise typer.Exit(code=1)
 
@@ -1450,7 +1623,7 @@ def preview_lineup_cmd(
         })
 
     if not lineup:
-        conn.close()
+        close_conn(conn)
         console.print("[red]Could not build any lineup entries.[/red]")
         raise typer.Exit(code=1)
 
@@ -1484,7 +1657,7 @@ def preview_lineup_cmd(
                 ),
             )
 
-    conn.close()
+    close_conn(conn)
 
     console.print(f"[bold]Saved lineup:[/bold] {len(lineup)} posts to database")
 
@@ -2,18 +2,29 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import shutil
 import sqlite3
 import subprocess
+import threading
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from src.config import get_config_value
+from src.config import get_config_values
 from src.db import now_utc
 from src.media.text_overlay import generate_overlay_frames
 
 VIDEO_DIR = Path("media/videos")
+# Footage pre-scaled/cropped to the output size, reused across videos
+FOOTAGE_MASTER_DIR = Path("media/footage/masters")
+
+# Hardware H.264 encoders tried (in order) when video.codec is "auto"
+HW_ENCODERS = ("h264_videotoolbox", "h264_nvenc", "h264_qsv")
+ENCODER_PROBE_TIMEOUT_SEC = 30
 
 
 def _check_ffmpeg() -> str:
@@ -27,8 +38,179 @@ def _check_ffmpeg() -> str:
     return path
 
 
+@lru_cache(maxsize=4)
+def _detect_encoder(ffmpeg: str) -> str:
+    """Return the first working hardware H.264 encoder, else ``libx264``.
+
+    ffmpeg builds often list encoders the machine cannot drive (e.g. NVENC
+    without a GPU), so each candidate must encode one tiny test frame.
+    """
+    try:
+        listing = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=ENCODER_PROBE_TIMEOUT_SEC,
+        ).stdout
+    except (subprocess.TimeoutExpired, OSError):
+        return "libx264"
+    for encoder in HW_ENCODERS:
+        if f" {encoder} " not in listing:
+            continue
+        try:
+            probe = subprocess.run(
+                [
+                    ffmpeg, "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+                    "-frames:v", "1", "-c:v", encoder, "-f", "null", "-",
+                ],
+                capture_output=True,
+                timeout=ENCODER_PROBE_TIMEOUT_SEC,
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            continue  # e.g. a hung GPU driver: treat as unusable
+        if probe.returncode == 0:
+            return encoder
+    return "libx264"
+
+
+def _video_codec_args(codec: str, bitrate: str, preset: str) -> list[str]:
+    """Encoder-specific ffmpeg video arguments targeting *bitrate*."""
+    if codec == "libx264":
+        return ["-c:v", codec, "-preset", preset, "-threads", "0", "-b:v", bitrate]
+    if codec == "h264_videotoolbox":
+        return ["-c:v", codec, "-b:v", bitrate, "-allow_sw", "1"]
+    if codec == "h264_nvenc":
+        return ["-c:v", codec, "-rc", "vbr", "-b:v", bitrate]
+    return ["-c:v", codec, "-b:v", bitrate]
+
+
+# MPEG audio Layer III tables, indexed by the header's version bits
+# (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_MP3_BITRATES_KBPS = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _run_ffmpeg(cmd: list[str], timeout: float = 300) -> None:
+    """Run an ffmpeg command, keeping only the tail of its stderr for errors."""
+    with subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    ) as proc:
+        tail: deque[bytes] = deque(maxlen=20)
+        reader = threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True)
+        reader.start()
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            raise
+        reader.join()
+
+    if returncode != 0:
+        stderr = b"".join(tail).decode(errors="replace")
+        raise RuntimeError(f"FFmpeg failed (exit {returncode}):\n{stderr[-500:]}")
+
+
+def _ensure_footage_master(
+    ffmpeg: str, footage_path: str, width: int, height: int, fps: int
+) -> str:
+    """Return a cached portrait master of *footage_path* at the output size.
+
+    Scaling/cropping is done once per (clip, resolution, fps); later videos
+    only loop, trim and overlay the master. The cache key includes the
+    source's mtime and size so a re-downloaded clip gets a fresh master.
+    """
+    stat = os.stat(footage_path)
+    key = f"{os.path.abspath(footage_path)}:{stat.st_mtime_ns}:{stat.st_size}:{width}x{height}@{fps}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    master = FOOTAGE_MASTER_DIR / f"{Path(footage_path).stem}.{digest}.portrait.mp4"
+    if master.exists():
+        return str(master)
+
+    FOOTAGE_MASTER_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = master.with_name(f"{master.stem}.{os.getpid()}.tmp.mp4")
+    try:
+        _run_ffmpeg([
+            ffmpeg, "-y", "-nostats",
+            "-i", footage_path,
+            "-an",
+            "-vf", (
+                f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+                f"crop={width}:{height},fps={fps}"
+            ),
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "18",
+            str(tmp),
+        ])
+        os.replace(tmp, master)
+    except BaseException:
+        # Nothing evicts the master cache, so don't leave partial files in it
+        tmp.unlink(missing_ok=True)
+        raise
+    return str(master)
+
+
+def _mp3_duration(audio_path: str) -> float | None:
+    """Read an MP3's duration from its frame headers, or None if unsure.
+
+    Uses the Xing/Info or VBRI frame count when present, otherwise assumes
+    constant bitrate (what the TTS providers emit).
+    """
+    file_size = os.path.getsize(audio_path)
+    with open(audio_path, "rb") as f:
+        head = f.read(10)
+        start = 0
+        if head[:3] == b"ID3" and len(head) == 10:
+            size = int.from_bytes(head[6:10], "big")
+            tag_size = sum(((size >> (8 * i)) & 0x7F) << (7 * i) for i in range(4))
+            start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        f.seek(start)
+        data = f.read(64 * 1024)
+        has_id3v1 = False
+        if file_size >= 128:
+            f.seek(-128, os.SEEK_END)
+            has_id3v1 = f.read(3) == b"TAG"
+
+    for i in range(len(data) - 3):
+        b1, b2, b3 = data[i + 1], data[i + 2], data[i + 3]
+        if data[i] != 0xFF or b1 & 0xE0 != 0xE0:
+            continue
+        version, layer = (b1 >> 3) & 3, (b1 >> 1) & 3
+        bitrate_idx, rate_idx = b2 >> 4, (b2 >> 2) & 3
+        if layer != 1 or version == 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            continue  # not Layer III, or a false sync
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+        samples_per_frame = 1152 if version == 3 else 576
+
+        mono = b3 >> 6 == 3
+        side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+        xing = i + 4 + side_info
+        frames = None
+        if data[xing:xing + 4] in (b"Xing", b"Info"):
+            if int.from_bytes(data[xing + 4:xing + 8], "big") & 1:  # frames field
+                frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+        elif data[i + 36:i + 40] == b"VBRI":
+            frames = int.from_bytes(data[i + 50:i + 54], "big")
+        if frames:
+            return frames * samples_per_frame / sample_rate
+
+        bitrate = _MP3_BITRATES_KBPS[3 if version == 3 else 2][bitrate_idx] * 1000
+        audio_bytes = file_size - start - i - (128 if has_id3v1 else 0)
+        return audio_bytes * 8 / bitrate
+    return None
+
+
 def _get_audio_duration(audio_path: str) -> float:
-    """Probe audio duration in seconds via ffprobe."""
+    """Audio duration in seconds, from MP3 headers or else via ffprobe."""
+    if audio_path.lower().endswith(".mp3"):
+        duration = _mp3_duration(audio_path)
+        if duration:
+            return duration
+
     ffprobe = shutil.which("ffprobe")
     if ffprobe is None:
         raise RuntimeError("ffprobe not found on PATH.")
@@ -59,10 +241,19 @@ def _build_text_filter(
     db_path: str | None = None,
 ) -> str:
     """Build the FFmpeg drawtext filter string for verse + prayer overlays."""
-    font = get_config_value("text.font_family", "Georgia", db_path)
-    verse_size = get_config_value("text.verse_font_size", 48, db_path)
-    color = get_config_value("text.color", "#FFFFFF", db_path)
-    shadow_color = get_config_value("text.shadow_color", "#000000", db_path)
+    cfg = get_config_values(
+        {
+            "text.font_family": "Georgia",
+            "text.verse_font_size": 48,
+            "text.color": "#FFFFFF",
+            "text.shadow_color": "#000000",
+        },
+        db_path,
+    )
+    font = cfg["text.font_family"]
+    verse_size = cfg["text.verse_font_size"]
+    color = cfg["text.color"]
+    shadow_color = cfg["text.shadow_color"]
 
     # Escape special characters for FFmpeg drawtext
     safe_ref = verse_ref.replace("'", "\\'").replace(":", "\\:")
@@ -126,10 +317,24 @@ def compose_video(
     ffmpeg = _check_ffmpeg()
 
     duration = _get_audio_duration(audio_path)
-    resolution = get_config_value("video.resolution", "1080x1920", db_path)
+    cfg = get_config_values(
+        {
+            "video.resolution": "1080x1920",
+            "video.fps": 30,
+            "video.bitrate": "8M",
+            "video.preset": "veryfast",
+            "video.codec": "auto",
+        },
+        db_path,
+    )
+    resolution = cfg["video.resolution"]
     width, height = resolution.split("x")
-    fps = get_config_value("video.fps", 30, db_path)
-    bitrate = get_config_value("video.bitrate", "8M", db_path)
+    fps = cfg["video.fps"]
+    bitrate = cfg["video.bitrate"]
+    preset = cfg["video.preset"]
+    codec = cfg["video.codec"]
+    if codec == "auto":
+        codec = _detect_encoder(ffmpeg)
 
     VIDEO_DIR.mkdir(parents=True, exist_ok=True)
     date_tag = post_date or _default_post_date()
@@ -139,6 +344,10 @@ def compose_video(
     if not footage_paths:
         raise RuntimeError("No footage clips provided.")
 
+    footage_paths = [
+        _ensure_footage_master(ffmpeg, fp, int(width), int(height), int(fps))
+        for fp in footage_paths
+    ]
     num_clips = len(footage_paths)
 
     # Generate text overlay frames using Pillow
@@ -157,9 +366,9 @@ def compose_video(
         )
 
     # Build FFmpeg command with overlay inputs
-    cmd = [ffmpeg, "-y"]
+    cmd = [ffmpeg, "-y", "-nostats"]
 
-    # Inputs 0..N-1: footage clips
+    # Inputs 0..N-1: footage clips (already at the output size)
     for fp in footage_paths:
         cmd.extend(["-i", fp])
 
@@ -177,12 +386,10 @@ def compose_video(
         base_filter = (
             f"[0:v]loop=loop=-1:size=1000:start=0,"
             f"trim=duration={duration},"
-            f"setpts=PTS-STARTPTS,"
-            f"scale={width}:{height}:force_original_aspect_ratio=increase,"
-            f"crop={width}:{height}[base]"
+            f"setpts=PTS-STARTPTS[base]"
         )
     else:
-        # Multi-clip: scale each, trim to equal share, concatenate
+        # Multi-clip: trim each to an equal share, concatenate
         clip_dur = duration / num_clips
         clip_parts = []
         for i in range(num_clips):
@@ -190,9 +397,7 @@ def compose_video(
             clip_parts.append(
                 f"[{i}:v]loop=loop=-1:size=1000:start=0,"
                 f"trim=duration={clip_dur},"
-                f"setpts=PTS-STARTPTS,"
-                f"scale={width}:{height}:force_original_aspect_ratio=increase,"
-                f"crop={width}:{height}[{label}]"
+                f"setpts=PTS-STARTPTS[{label}]"
             )
         concat_inputs = "".join(f"[clip{i}]" for i in range(num_clips))
         clip_parts.append(
@@ -225,9 +430,7 @@ def compose_video(
         "-filter_complex", filter_complex,
         "-map", "[outv]",
         "-map", f"{audio_input_idx}:a",
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-b:v", bitrate,
+        *_video_codec_args(codec, bitrate, preset),
         "-r", str(fps),
         "-c:a", "aac",
         "-b:a", "192k",
@@ -236,11 +439,7 @@ def compose_video(
         str(out_path),
     ])
 
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"FFmpeg failed (exit {result.returncode}):\n{result.stderr[-500:]}"
-        )
+    _run_ffmpeg(cmd)
 
     file_size = out_path.stat().st_size
     return {
@@ -260,9 +459,17 @@ def save_video_record(
     db_path: str | None = None,
 ) -> int:
     """Insert a generated_videos row and return its id."""
-    font_style = get_config_value("text.font_family", "Georgia", db_path)
-    font_size = get_config_value("text.verse_font_size", 48, db_path)
-    text_position = get_config_value("text.position", "bottom", db_path)
+    cfg = get_config_values(
+        {
+            "text.font_family": "Georgia",
+            "text.verse_font_size": 48,
+            "text.position": "bottom",
+        },
+        db_path,
+    )
+    font_style = cfg["text.font_family"]
+    font_size = cfg["text.verse_font_size"]
+    text_position = cfg["text.position"]
 
     cur = conn.execute(
         """
@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -285,6 +286,33 @@ def download_clip(
     return out_path
 
 
+def download_clips(
+    clips: list[dict[str, Any]],
+    theme_slug: str = "general",
+    max_workers: int = 4,
+) -> list[Path]:
+    """Download *clips* concurrently (I/O-bound) and return paths in input order."""
+    if len(clips) <= 1:
+        return [download_clip(clip, theme_slug) for clip in clips]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(clips))) as pool:
+        return list(pool.map(lambda clip: download_clip(clip, theme_slug), clips))
+
+
+def fetch_footage(
+    keywords: list[str],
+    theme_slug: str = "general",
+    db_path: str | None = None,
+    max_results: int = 2,
+) -> list[tuple[dict[str, Any], str]]:
+    """Search for footage and download the hits; returns (clip, path) pairs.
+
+    Only does network and file I/O (no DB writes), so it can run on a
+    worker thread while audio is generated.
+    """
+    clips = search_footage(keywords, db_path, max_results=max_results)
+    return [(clip, str(path)) for clip, path in zip(clips, download_clips(clips, theme_slug))]
+
+
 def save_footage_record(
     conn: sqlite3.Connection,
     clip: dict[str, Any],
@@ -323,3 +351,56 @@ def save_footage_record(
     )
     conn.commit()
     return cur.lastrowid
+
+
+def save_footage_records(
+    conn: sqlite3.Connection,
+    downloads: list[tuple[dict[str, Any], str]],
+    theme_id: int | None = None,
+    keywords: list[str] | None = None,
+) -> list[int]:
+    """Batch save_footage_record for ``(clip, download_path)`` pairs.
+
+    New clips are inserted with one executemany in a single transaction;
+    clips already stored keep their row. Returns ids in input order.
+    """
+    if not downloads:
+        return []
+    now = now_utc()
+    keywords_json = json.dumps(keywords or [])
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO stock_footage
+                (source, external_id, url, download_path, keywords,
+                 duration_sec, resolution, attribution, theme_id, downloaded_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source, external_id) DO NOTHING
+            """,
+            [
+                (
+                    clip["source"],
+                    clip["external_id"],
+                    clip.get("url", ""),
+                    download_path,
+                    keywords_json,
+                    clip.get("duration_sec"),
+                    clip.get("resolution"),
+                    clip.get("attribution"),
+                    theme_id,
+                    now,
+                    now,
+                )
+                for clip, download_path in downloads
+            ],
+        )
+
+    keys = [(clip["source"], str(clip["external_id"])) for clip, _ in downloads]
+    placeholders = ", ".join(["(?, ?)"] * len(keys))
+    cur = conn.execute(
+        "SELECT id, source, external_id FROM stock_footage "
+        f"WHERE (source, external_id) IN (VALUES {placeholders})",
+        [v for key in keys for v in key],
+    )
+    ids = {(row[1], row[2]): row[0] for row in cur.fetchall()}
+    return [ids[key] for key in keys]
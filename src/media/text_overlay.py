@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from typing import Any
 
@@ -206,9 +207,11 @@ def generate_single_overlay(
     height: int = 1920,
     cta_override: str | None = None,
     hook_text: str = "",
+    out_path: Path | str | None = None,
 ) -> str:
     """Generate a single overlay image for a specific prayer chunk.
 
+    Writes to *out_path* if given, otherwise ``media/overlays/overlay_<n>.png``.
     Returns the file path to the PNG.
     """
     OVERLAY_DIR.mkdir(parents=True, exist_ok=True)
@@ -258,7 +261,11 @@ def generate_single_overlay(
             _draw_text_with_shadow(draw, (line_x, y_cursor), line, hook_font, fill=accent)
             y_cursor += 42
 
-    frame_path = OVERLAY_DIR / f"overlay_{chunk_index}.png"
-    img.save(frame_path, "PNG")
+    frame_path = Path(out_path) if out_path else OVERLAY_DIR / f"overlay_{chunk_index}.png"
+    # Overlays are intermediate frames: fast zlib level, then an atomic
+    # same-directory replace so readers never see a partial PNG.
+    tmp_path = frame_path.with_name(f".{frame_path.name}.tmp")
+    img.save(tmp_path, "PNG", compress_level=1)
+    os.replace(tmp_path, frame_path)
 
     return str(frame_path)
@@ -1,9 +1,20 @@
 """Tests for src/media/compositor.py - FFmpeg video compositing and storage."""
 
 import json
+import os
+import subprocess
+import sys
 
 from src.db import connect, init_schema, now_utc
-from src.media.compositor import _build_text_filter, save_video_record
+from src.media.compositor import (
+    _build_text_filter,
+    _detect_encoder,
+    _ensure_footage_master,
+    _get_audio_duration,
+    _run_ffmpeg,
+    _video_codec_args,
+    save_video_record,
+)
 
 
 def _seed_prayer_with_audio(conn):
@@ -62,6 +73,125 @@ def test_build_text_filter_truncates_long_text():
     assert "..." in f
 
 
+def test_detect_encoder_skips_listed_but_unusable_encoders(monkeypatch):
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        if "-encoders" in cmd:
+            return subprocess.CompletedProcess(
+                cmd, 0, stdout=" V....D h264_nvenc  NVIDIA\n V....D h264_qsv  Intel\n"
+            )
+        return subprocess.CompletedProcess(cmd, 0 if "h264_qsv" in cmd else 1)
+
+    monkeypatch.setattr("src.media.compositor.subprocess.run", fake_run)
+    _detect_encoder.cache_clear()
+    try:
+        assert _detect_encoder("/fake/ffmpeg") == "h264_qsv"
+        assert _detect_encoder("/fake/ffmpeg") == "h264_qsv"
+    finally:
+        _detect_encoder.cache_clear()
+    assert len(calls) == 3  # listing + nvenc probe + qsv probe, then cached
+
+
+def test_detect_encoder_treats_hung_probe_as_unusable(monkeypatch):
+    def fake_run(cmd, **kwargs):
+        assert kwargs.get("timeout")
+        if "-encoders" in cmd:
+            return subprocess.CompletedProcess(cmd, 0, stdout=" V....D h264_nvenc  NVIDIA\n")
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+    monkeypatch.setattr("src.media.compositor.subprocess.run", fake_run)
+    _detect_encoder.cache_clear()
+    try:
+        assert _detect_encoder("/fake/ffmpeg") == "libx264"
+    finally:
+        _detect_encoder.cache_clear()
+
+
+def test_video_codec_args_preset_only_for_libx264():
+    assert _video_codec_args("libx264", "2M", "veryfast") == [
+        "-c:v", "libx264", "-preset", "veryfast", "-threads", "0", "-b:v", "2M",
+    ]
+    assert "-preset" not in _video_codec_args("h264_nvenc", "2M", "veryfast")
+
+
+# MPEG-1 Layer III, 128 kbps, 48 kHz, stereo: 384-byte frames of 1152 samples
+_MP3_FRAME_HEADER = b"\xff\xfb\x94\x00"
+
+
+def test_get_audio_duration_reads_cbr_mp3_without_ffprobe(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.media.compositor.shutil.which", lambda name: None)
+    mp3 = tmp_path / "prayer.mp3"
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    mp3.write_bytes(id3 + (_MP3_FRAME_HEADER + b"\x00" * 380) * 1000)
+
+    assert _get_audio_duration(str(mp3)) == 1000 * 1152 / 48000
+
+
+def test_get_audio_duration_uses_xing_frame_count(tmp_path):
+    mp3 = tmp_path / "prayer.mp3"
+    xing = b"Xing" + (1).to_bytes(4, "big") + (500).to_bytes(4, "big")
+    first = _MP3_FRAME_HEADER + b"\x00" * 32 + xing
+    mp3.write_bytes(first + b"\x00" * (384 - len(first)) + _MP3_FRAME_HEADER * 10)
+
+    assert _get_audio_duration(str(mp3)) == 500 * 1152 / 48000
+
+
+def test_run_ffmpeg_reports_stderr_tail():
+    noisy = "import sys\nfor i in range(5000): print(f'line {i}', file=sys.stderr)\nsys.exit(3)"
+
+    try:
+        _run_ffmpeg([sys.executable, "-c", noisy])
+        assert False, "Should have raised"
+    except RuntimeError as exc:
+        assert "exit 3" in str(exc)
+        assert "line 4999" in str(exc)
+        assert "line 0\n" not in str(exc)
+
+
+def test_ensure_footage_master_encodes_once_per_clip_version(tmp_path, monkeypatch):
+    encodes = []
+
+    def fake_run_ffmpeg(cmd):
+        encodes.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"master")
+
+    monkeypatch.setattr("src.media.compositor._run_ffmpeg", fake_run_ffmpeg)
+    monkeypatch.setattr("src.media.compositor.FOOTAGE_MASTER_DIR", tmp_path / "masters")
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"source")
+
+    first = _ensure_footage_master("ffmpeg", str(clip), 1080, 1920, 30)
+    assert _ensure_footage_master("ffmpeg", str(clip), 1080, 1920, 30) == first
+    assert len(encodes) == 1
+    assert "crop=1080:1920,fps=30" in " ".join(encodes[0])
+
+    os.utime(clip, ns=(0, 0))  # clip replaced on disk
+    assert _ensure_footage_master("ffmpeg", str(clip), 1080, 1920, 30) != first
+    assert len(encodes) == 2
+
+
+def test_ensure_footage_master_removes_partial_output_on_failure(tmp_path, monkeypatch):
+    def failing_run_ffmpeg(cmd):
+        with open(cmd[-1], "wb") as f:
+            f.write(b"partial")
+        raise RuntimeError("FFmpeg failed (exit 1)")
+
+    monkeypatch.setattr("src.media.compositor._run_ffmpeg", failing_run_ffmpeg)
+    monkeypatch.setattr("src.media.compositor.FOOTAGE_MASTER_DIR", tmp_path / "masters")
+    clip = tmp_path / "clip.mp4"
+    clip.write_bytes(b"source")
+
+    try:
+        _ensure_footage_master("ffmpeg", str(clip), 1080, 1920, 30)
+        assert False, "Should have raised"
+    except RuntimeError:
+        pass
+    assert list((tmp_path / "masters").iterdir()) == []
+
+
 def test_save_video_record(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
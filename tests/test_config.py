@@ -1,6 +1,7 @@
 """Tests for src/config.py - configuration management."""
 
 import json
+import math
 import os
 
 from src.config import (
@@ -8,9 +9,13 @@ from src.config import (
     _set_nested,
     delete_config_override,
     flatten_config,
+    get_config_value,
+    get_config_values,
     load_config,
+    load_db_overrides,
     load_yaml,
     set_config_override,
+    set_config_overrides,
 )
 from src.db import connect, init_schema
 
@@ -23,6 +28,12 @@ def test_load_yaml_reads_file(tmp_path):
     assert data["nested"]["a"] == 1
 
 
+def test_load_yaml_reads_utf8_bytes(tmp_path):
+    yaml_file = tmp_path / "test.yaml"
+    yaml_file.write_text("cta: \"Tag someone — 🙏\"\n", encoding="utf-8")
+    assert load_yaml(yaml_file)["cta"] == "Tag someone — 🙏"
+
+
 def test_load_yaml_missing_file(tmp_path):
     data = load_yaml(tmp_path / "missing.yaml")
     assert data == {}
@@ -50,6 +61,11 @@ def test_get_nested_missing():
     assert _get_nested(d, "voice.missing", "default") == "default"
 
 
+def test_get_nested_through_scalar_returns_default():
+    d = {"voice": {"speed": 0.95}}
+    assert _get_nested(d, "voice.speed.value", "default") == "default"
+
+
 def test_get_nested_top_level():
     d = {"key": "value"}
     assert _get_nested(d, "key") == "value"
@@ -103,6 +119,15 @@ def test_delete_config_override(tmp_path):
     assert delete_config_override("nonexistent", db_path) is False
 
 
+def test_set_config_overrides_batch_creates_schema(tmp_path):
+    db_path = str(tmp_path / "fresh.db")  # no init_schema beforehand
+
+    set_config_overrides({"voice.speed": 0.8, "video.fps": 24}, db_path)
+    set_config_override("video.fps", 30, db_path)
+
+    assert load_db_overrides(db_path) == {"voice.speed": 0.8, "video.fps": 30}
+
+
 def test_load_config_merges_overrides(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -113,3 +138,72 @@ def test_load_config_merges_overrides(tmp_path):
     config = load_config(db_path)
     # The default.yaml has voice.speed: 0.95, override should win
     assert config.get("voice", {}).get("speed") == 0.8
+
+
+def test_load_config_is_cached_until_override_changes(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    conn.close()
+
+    first = load_config(db_path)
+    first["voice"]["speed"] = 99  # callers get their own copy
+    assert get_config_value("voice.speed", db_path=db_path) == 0.95
+
+    set_config_override("voice.speed", 0.8, db_path)
+    assert get_config_value("voice.speed", db_path=db_path) == 0.8
+
+    delete_config_override("voice.speed", db_path)
+    assert get_config_value("voice.speed", db_path=db_path) == 0.95
+
+
+def test_get_config_values_reads_one_snapshot(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    conn.close()
+    set_config_override("voice.speed", 0.8, db_path)
+
+    values = get_config_values(
+        {"voice.speed": 1.0, "voice.missing": "fallback", "video.fps": None}, db_path
+    )
+    assert values == {
+        "voice.speed": 0.8,
+        "voice.missing": "fallback",
+        "video.fps": get_config_value("video.fps", db_path=db_path),
+    }
+
+
+def test_load_db_overrides_decodes_json_and_keeps_raw_strings(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    conn.executemany(
+        "INSERT INTO config_overrides (key, value) VALUES (?, ?)",
+        [
+            ("voice.speed", "0.8"),
+            ("voice.provider", json.dumps("openai")),
+            ("footage.keywords", json.dumps(["sunrise", "ocean"])),
+            ("legacy.raw", "plain text"),
+            ("legacy.almost", "true-ish"),
+            ("video.nan", json.dumps(float("nan"))),
+            ("video.max", json.dumps(float("inf"))),
+            ("video.min", json.dumps(float("-inf"))),
+            ("video.padded", " 24"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    overrides = load_db_overrides(db_path)
+    assert math.isnan(overrides.pop("video.nan"))
+    assert overrides == {
+        "voice.speed": 0.8,
+        "voice.provider": "openai",
+        "footage.keywords": ["sunrise", "ocean"],
+        "legacy.raw": "plain text",
+        "legacy.almost": "true-ish",
+        "video.max": float("inf"),
+        "video.min": float("-inf"),
+        "video.padded": 24,
+    }
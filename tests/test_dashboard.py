@@ -0,0 +1,28 @@
+"""Tests for src/dashboard.py - Streamlit analytics homepage."""
+
+from src.db import connect, init_schema
+from streamlit.testing.v1 import AppTest
+
+
+def test_dashboard_keeps_posts_with_null_views(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    conn.executemany(
+        "INSERT INTO tiktok_posts (post_id, created_at, views, likes) VALUES (?, ?, ?, ?)",
+        [
+            ("p1", "2025-01-15T18:00:00+00:00", 100, 5),
+            ("p2", "2025-01-16T18:00:00+00:00", None, 3),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("DB_PATH", db_path)
+
+    at = AppTest.from_file("../src/dashboard.py", default_timeout=30)
+    at.run()
+
+    assert not at.exception
+    metrics = {m.label: m.value for m in at.metric}
+    assert metrics["Posts"] == "2"
+    assert metrics["Total views"] == "100"
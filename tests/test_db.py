@@ -1,8 +1,20 @@
 """Tests for src/db.py - database utilities and schema."""
 
+import os
 import sqlite3
 
-from src.db import connect, init_schema, now_utc
+from src.db import (
+    analyze,
+    apply_pragmas,
+    bulk_upsert_posts,
+    close_conn,
+    connect,
+    get_db_mtime,
+    get_shared_connection,
+    init_schema,
+    now_utc,
+    read_dashboard_summary,
+)
 
 
 def test_connect_creates_file(tmp_path):
@@ -13,6 +25,18 @@ def test_connect_creates_file(tmp_path):
     assert (tmp_path / "test.db").exists()
 
 
+def test_close_conn_optimizes_and_closes(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    init_schema(conn)
+    close_conn(conn)
+    try:
+        conn.execute("SELECT 1")
+    except sqlite3.ProgrammingError:
+        pass
+    else:
+        raise AssertionError("connection still open")
+
+
 def test_connect_enables_wal(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -31,6 +55,16 @@ def test_connect_enables_foreign_keys(tmp_path):
     conn.close()
 
 
+def test_apply_pragmas_tunes_connection(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    apply_pragmas(conn)
+    assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store;").fetchone()[0] == 2  # MEMORY
+    assert conn.execute("PRAGMA cache_size;").fetchone()[0] == -65536
+    conn.close()
+
+
 def test_connect_sets_row_factory(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -38,6 +72,27 @@ def test_connect_sets_row_factory(tmp_path):
     conn.close()
 
 
+def test_connect_sets_busy_timeout(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    assert conn.execute("PRAGMA busy_timeout;").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+    conn.close()
+
+
+def test_get_shared_connection_is_reused_per_thread(tmp_path):
+    import threading
+
+    db_path = str(tmp_path / "test.db")
+    conn = get_shared_connection(db_path)
+    assert get_shared_connection(db_path) is conn
+
+    other: list[sqlite3.Connection] = []
+    t = threading.Thread(target=lambda: other.append(get_shared_connection(db_path)))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+
 def test_init_schema_creates_all_tables(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -82,6 +137,116 @@ def test_init_schema_creates_indexes(tmp_path):
     assert "idx_publish_queue_scheduled" in indexes
 
 
+def test_init_schema_creates_dashboard_join_indexes(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' ORDER BY name"
+    )
+    indexes = {row["name"] for row in cur.fetchall()}
+    conn.close()
+
+    assert "idx_prayers_verse" in indexes
+    assert "idx_prayers_theme" in indexes
+    assert "idx_prayers_created_at" in indexes
+    assert "idx_generated_videos_prayer" in indexes
+    assert "idx_generated_videos_created_at" in indexes
+    assert "idx_publish_queue_video" in indexes
+    assert "idx_publish_queue_updated_status" in indexes
+    assert "idx_test_runs_completed_at" in indexes
+
+
+def test_recent_queue_status_uses_covering_index(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+
+    plan = " ".join(
+        row["detail"]
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN "
+            "SELECT status FROM publish_queue ORDER BY updated_at DESC LIMIT 3"
+        )
+    )
+    conn.close()
+
+    assert "COVERING INDEX idx_publish_queue_updated_status" in plan
+
+
+def test_dashboard_summary_tracks_queue_and_test_runs(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    init_schema(conn)
+    assert read_dashboard_summary(conn) == {
+        "pq_counts": {},
+        "pq_recent_statuses": [],
+        "latest_run": None,
+    }
+
+    conn.executemany(
+        "INSERT INTO publish_queue (status, updated_at) VALUES (?, ?)",
+        [("failed", "2025-01-01"), ("pending", "2025-01-02"), ("failed", "2025-01-03")],
+    )
+    conn.execute(
+        "INSERT INTO test_runs (run_id, status, completed_at) VALUES ('r1', 'passed', '2025-01-01')"
+    )
+    conn.execute("UPDATE publish_queue SET status = 'approved' WHERE status = 'pending'")
+    summary = read_dashboard_summary(conn)
+    conn.close()
+
+    assert summary["pq_counts"] == {"failed": 2, "approved": 1}
+    assert sorted(summary["pq_recent_statuses"]) == ["approved", "failed", "failed"]
+    assert summary["latest_run"]["run_id"] == "r1"
+
+
+def test_init_schema_rerun_writes_nothing(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    init_schema(conn)
+    conn.execute("INSERT INTO publish_queue (status, updated_at) VALUES ('failed', '2025-01-01')")
+    conn.commit()
+    changes = conn.total_changes
+
+    init_schema(conn)  # every CLI command does this; must not touch the DB
+    assert conn.total_changes == changes
+    assert read_dashboard_summary(conn)["pq_counts"] == {"failed": 1}
+    conn.close()
+
+
+def test_get_db_mtime_tracks_wal_writes(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    assert get_db_mtime(db_path) == 0
+
+    conn = connect(db_path)
+    init_schema(conn)
+    before = get_db_mtime(db_path)
+    os.utime(f"{db_path}-wal", ns=(before + 10**9, before + 10**9))
+    assert get_db_mtime(db_path) == before + 10**9
+    conn.close()
+
+
+def test_read_dashboard_summary_without_table(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    assert read_dashboard_summary(conn) == {}
+    conn.close()
+
+
+def test_analyze_writes_planner_stats(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    conn.execute("INSERT INTO publish_queue (status, updated_at) VALUES ('pending', '2025-01-01')")
+    conn.commit()
+    conn.close()
+
+    analyze(db_path)
+
+    conn = connect(db_path)
+    tables = {row["tbl"] for row in conn.execute("SELECT tbl FROM sqlite_stat1")}
+    conn.close()
+    assert "publish_queue" in tables
+
+
 def test_init_schema_is_idempotent(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -158,3 +323,84 @@ def test_bible_verses_foreign_key(tmp_path):
     )
     assert cur.fetchone()["reference"] == "John 3:16"
     conn.close()
+
+
+# tiktok_posts as created before the generated columns were added
+_LEGACY_POSTS_TABLE = """
+CREATE TABLE tiktok_posts (
+    post_id TEXT PRIMARY KEY, created_at TEXT, views INTEGER, likes INTEGER,
+    comments INTEGER, shares INTEGER, favorites INTEGER, caption TEXT, url TEXT,
+    raw_json TEXT, updated_at TEXT
+)
+"""
+
+
+def test_caption_fts_tracks_post_writes(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    # Posts imported before the schema (and its FTS index) existed
+    conn.execute(_LEGACY_POSTS_TABLE)
+    conn.execute("INSERT INTO tiktok_posts (post_id, caption) VALUES ('p1', 'Morning Prayer')")
+    init_schema(conn)  # creates the index and backfills p1
+    conn.execute("INSERT INTO tiktok_posts (post_id, caption) VALUES ('p2', 'evening prayer')")
+    conn.execute("UPDATE tiktok_posts SET caption = 'gratitude' WHERE post_id = 'p1'")
+
+    def search(term: str) -> list[str]:
+        return [
+            row["post_id"]
+            for row in conn.execute(
+                "SELECT post_id FROM tiktok_posts WHERE rowid IN "
+                "(SELECT rowid FROM tiktok_posts_fts WHERE tiktok_posts_fts MATCH ?) "
+                "ORDER BY post_id",
+                (f'"{term}"',),
+            )
+        ]
+
+    assert search("PRAYER") == ["p2"]
+    assert search("atitu") == ["p1"]
+    conn.execute("DELETE FROM tiktok_posts WHERE post_id = 'p2'")
+    assert search("prayer") == []
+    conn.close()
+
+
+def test_bulk_upsert_posts_batches_and_updates(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    init_schema(conn)
+    posts = [{"post_id": f"p{i}", "views": i, "caption": "prayer"} for i in range(5)]
+
+    assert bulk_upsert_posts(conn, posts, batch_size=2) == 5
+    assert bulk_upsert_posts(conn, [{"post_id": "p1", "views": 99}]) == 1
+
+    rows = conn.execute("SELECT post_id, views, caption FROM tiktok_posts ORDER BY post_id").fetchall()
+    conn.close()
+    assert len(rows) == 5
+    assert (rows[1]["views"], rows[1]["caption"]) == (99, None)
+
+
+def test_generated_post_columns_are_migrated_and_indexed(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    # A tiktok_posts table from before created_at_epoch existed
+    conn.execute(_LEGACY_POSTS_TABLE)
+    conn.execute(
+        "INSERT INTO tiktok_posts (post_id, created_at, likes, shares) "
+        "VALUES ('old', '2025-01-15T10:00:00+00:00', 5, 2)"
+    )
+    init_schema(conn)
+    init_schema(conn)  # migration is idempotent
+    conn.execute(
+        "INSERT INTO tiktok_posts (post_id, created_at) VALUES ('new', '2025-01-15T04:00:00.5-06:00')"
+    )
+
+    epochs = dict(conn.execute("SELECT post_id, created_at_epoch FROM tiktok_posts").fetchall())
+    engagement = dict(conn.execute("SELECT post_id, engagement FROM tiktok_posts").fetchall())
+    plan = " ".join(
+        row["detail"]
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT post_id FROM tiktok_posts "
+            "WHERE created_at_epoch >= 0 AND created_at_epoch < 1"
+        )
+    )
+    conn.close()
+
+    assert epochs == {"old": 1736935200, "new": 1736935200}
+    assert engagement == {"old": 7, "new": 0}
+    assert "idx_tiktok_posts_epoch_views" in plan
@@ -1,13 +1,18 @@
 """Tests for src/media/footage.py - stock footage search, download, storage."""
 
 import json
+import time
+from pathlib import Path
 from unittest.mock import MagicMock
 
 from src.db import connect, init_schema, now_utc
 from src.media.footage import (
     _pick_best_pexels_file,
+    download_clips,
+    fetch_footage,
     generate_kling_clips,
     save_footage_record,
+    save_footage_records,
     search_footage,
 )
 
@@ -91,6 +96,57 @@ def test_save_footage_record_deduplicates(tmp_path):
     conn.close()
 
 
+def test_download_clips_keeps_input_order(monkeypatch):
+    def fake_download(clip, theme_slug="general"):
+        time.sleep(clip["delay"])
+        return Path(f"{clip['external_id']}_{theme_slug}.mp4")
+
+    monkeypatch.setattr("src.media.footage.download_clip", fake_download)
+    clips = [{"external_id": "a", "delay": 0.05}, {"external_id": "b", "delay": 0.0}]
+
+    paths = download_clips(clips, "hope")
+
+    assert paths == [Path("a_hope.mp4"), Path("b_hope.mp4")]
+
+
+def test_fetch_footage_pairs_clips_with_download_paths(monkeypatch):
+    clips = [{"external_id": "a"}, {"external_id": "b"}]
+    monkeypatch.setattr(
+        "src.media.footage.search_footage", lambda keywords, db_path, max_results: clips
+    )
+    monkeypatch.setattr(
+        "src.media.footage.download_clip",
+        lambda clip, theme_slug="general": Path(f"{clip['external_id']}_{theme_slug}.mp4"),
+    )
+
+    assert fetch_footage(["hope"], "hope") == [
+        (clips[0], "a_hope.mp4"),
+        (clips[1], "b_hope.mp4"),
+    ]
+
+
+def test_save_footage_records_batches_and_keeps_existing_ids(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+
+    old = {"source": "pexels", "external_id": "1", "url": "https://pexels.com/video/1"}
+    old_id = save_footage_record(conn, old, "/tmp/old.mp4")
+    new = {"source": "pixabay", "external_id": "2", "url": "https://pixabay.com/videos/2"}
+
+    ids = save_footage_records(
+        conn, [(new, "/tmp/new.mp4"), (old, "/tmp/again.mp4")], keywords=["hope"]
+    )
+
+    assert ids[1] == old_id
+    row = conn.execute("SELECT * FROM stock_footage WHERE id = ?", (ids[0],)).fetchone()
+    assert row["download_path"] == "/tmp/new.mp4"
+    assert json.loads(row["keywords"]) == ["hope"]
+    assert conn.execute("SELECT COUNT(*) FROM stock_footage").fetchone()[0] == 2
+    assert save_footage_records(conn, []) == []
+    conn.close()
+
+
 def test_search_pexels_raises_without_key(monkeypatch):
     monkeypatch.delenv("PEXELS_API_KEY", raising=False)
 
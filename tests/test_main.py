@@ -1,44 +1,22 @@
 import sqlite3
 
 import pandas as pd
+from src.db import bulk_upsert_posts
 from src.main import (
+    _df_to_markdown_table,
+    _footage_prefetch,
+    connect,
+    dataframe_to_posts,
+    import_csv,
+    import_verses_cmd,
     init_db,
-    load_posts,
     normalize_columns,
     parse_datetime,
-    row_to_post,
-    to_int,
-    upsert_post,
+    refresh_daily_stats,
+    summarize_posts,
+    top_posts_by_views,
 )
 
-# --- to_int tests ---
-
-def test_to_int_basic():
-    assert to_int("123") == 123
-    assert to_int(456) == 456
-
-
-def test_to_int_with_commas():
-    assert to_int("1,234") == 1234
-    assert to_int("1,234,567") == 1234567
-
-
-def test_to_int_with_float():
-    assert to_int("123.45") == 123
-    assert to_int(99.9) == 99
-
-
-def test_to_int_empty_and_none():
-    assert to_int(None) is None
-    assert to_int("") is None
-    assert to_int("   ") is None
-
-
-def test_to_int_invalid():
-    assert to_int("abc") is None
-    assert to_int("twelve") is None
-
-
 # --- normalize_columns tests ---
 
 def test_normalize_columns_lowercase():
@@ -73,6 +51,11 @@ def test_parse_datetime_iso_format():
     assert "2025-01-15" in dt
 
 
+def test_parse_datetime_iso_normalizes_to_utc():
+    assert parse_datetime("2025-01-15T10:30:00+05:30") == "2025-01-15T05:00:00+00:00"
+    assert parse_datetime("2025-01-15 10:30") == "2025-01-15T10:30:00+00:00"
+
+
 def test_parse_datetime_human_readable():
     dt = parse_datetime("January 15, 2025")
     assert dt is not None
@@ -84,54 +67,68 @@ def test_parse_datetime_empty_and_none():
     assert parse_datetime("") is None
 
 
-# --- row_to_post tests ---
+# --- dataframe_to_posts tests ---
+
+def test_dataframe_to_posts_uses_first_usable_column():
+    df = normalize_columns(pd.DataFrame({
+        "Video ID": ["", "v2", "v3"],
+        "id": ["x1", "", "x3"],
+        "Create Time": ["1700000000", "2024-01-15 10:00", ""],
+        "Plays": ["1,234", "", "12.9"],
+        "views": ["", "7", "oops"],
+        "Likes": [5, 6, 7],
+        "Caption": ["Hello", "", "nan"],
+        "text": ["fallback", "used", ""],
+    }))
+    posts = dataframe_to_posts(df).drop(columns="raw_json").to_dict(orient="records")
+    blank = {"comments": None, "shares": None, "favorites": None, "url": None}
+    assert posts == [
+        {"post_id": "x1", "created_at": "2023-11-14T22:13:20+00:00", "views": 1234,
+         "likes": 5, "caption": "Hello", **blank},
+        {"post_id": "v2", "created_at": "2024-01-15T10:00:00+00:00", "views": 7,
+         "likes": 6, "caption": "used", **blank},
+        # "oops" is the first non-empty views value, so 12.9 plays is not used
+        {"post_id": "x3", "created_at": None, "views": None, "likes": 7, "caption": None, **blank},
+    ]
+
+
+def test_dataframe_to_posts_raw_json_is_compact_and_keeps_unicode():
+    df = pd.DataFrame({"post_id": ["1"], "caption": ["Amén 🙏 / \"quoted\""]})
+    posts = dataframe_to_posts(df)
+    assert posts["raw_json"].tolist() == ['{"post_id":"1","caption":"Amén 🙏 / \\"quoted\\""}']
+
+
+def test_dataframe_to_posts_drops_rows_without_post_id():
+    df = pd.DataFrame({"post_id": ["a", "", "NaN"], "views": ["1", "2", "3"]})
+    posts = dataframe_to_posts(df)
+    assert posts["post_id"].tolist() == ["a"]
+    assert posts["views"].tolist() == [1]
+    assert posts["created_at"].tolist() == [None]
+
+
+def test_df_to_markdown_table_formats_and_escapes():
+    df = pd.DataFrame({
+        "post_id": ["a|b", "c"],
+        "views": [10, 20],
+        "engagement_rate": [0.12345, float("nan")],
+        "caption": [" line\none ", None],
+    })
+    md = _df_to_markdown_table(df, ["post_id", "views", "engagement_rate", "caption", "url"])
+    assert md.splitlines()[2:] == [
+        "| a\\|b | 10 | 0.1235 | line one |  |",
+        "| c | 20 |  |  |  |",
+    ]
 
-def test_row_to_post_requires_post_id():
-    post, err = row_to_post({"views": "10", "likes": "1"})
-    assert post is None
-    assert err is not None
 
+# --- init_db tests ---
 
-def test_row_to_post_maps_all_fields():
-    row = {
-        "post_id": "123456",
-        "created_at": "2025-01-15T10:00:00Z",
-        "views": "1000",
-        "likes": "100",
-        "comments": "10",
-        "shares": "5",
-        "favorites": "50",
-        "caption": "Test caption",
-        "url": "https://tiktok.com/video/123456",
-    }
-    post, err = row_to_post(row)
-    assert err is None
-    assert post["post_id"] == "123456"
-    assert post["views"] == 1000
-    assert post["likes"] == 100
-    assert post["comments"] == 10
-    assert post["shares"] == 5
-    assert post["favorites"] == 50
-    assert post["caption"] == "Test caption"
-    assert post["url"] == "https://tiktok.com/video/123456"
-
-
-def test_row_to_post_alternative_keys():
-    row = {
-        "video_id": "789",
-        "play_count": "5000",
-        "digg_count": "200",
-        "description": "Alt caption",
-    }
-    post, err = row_to_post(row)
-    assert err is None
-    assert post["post_id"] == "789"
-    assert post["views"] == 5000
-    assert post["likes"] == 200
-    assert post["caption"] == "Alt caption"
-
+def test_connect_applies_wal_and_tuning_pragmas(tmp_path):
+    conn = connect(str(tmp_path / "test.db"))
+    assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+    conn.close()
 
-# --- init_db tests ---
 
 def test_db_schema_creates_table(tmp_path):
     db_path = tmp_path / "test.db"
@@ -151,108 +148,186 @@ def test_db_schema_creates_index(tmp_path):
     conn.close()
 
 
-# --- upsert_post tests ---
-
-def test_upsert_post_insert(tmp_path):
+def test_import_csv_first_load_builds_index_after_insert(tmp_path, monkeypatch):
     db_path = tmp_path / "test.db"
-    conn = sqlite3.connect(db_path)
-    init_db(conn)
+    monkeypatch.setenv("DB_PATH", str(db_path))
+    csv_path = tmp_path / "posts.csv"
+    csv_path.write_text("post_id,create_time,views\np1,2025-01-15T10:00:00Z,100\np2,,5\n")
 
-    post = {
-        "post_id": "test123",
-        "created_at": "2025-01-15T10:00:00+00:00",
-        "views": 1000,
-        "likes": 100,
-        "comments": 10,
-        "shares": 5,
-        "favorites": 50,
-        "caption": "Test",
-        "url": "https://example.com",
-        "raw_json": "{}",
-    }
-
-    with conn:
-        upsert_post(conn, post)
+    import_csv(str(csv_path))
 
-    cur = conn.execute("SELECT post_id, views FROM tiktok_posts WHERE post_id = 'test123'")
-    row = cur.fetchone()
-    assert row is not None
-    assert row[0] == "test123"
-    assert row[1] == 1000
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM tiktok_posts").fetchone()[0] == 2
+    cur = conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='idx_tiktok_posts_created_at';")
+    assert cur.fetchone() is not None
     conn.close()
 
 
-def test_upsert_post_update(tmp_path):
+def test_import_csv_streams_chunks_in_one_pass(tmp_path, monkeypatch):
     db_path = tmp_path / "test.db"
-    conn = sqlite3.connect(db_path)
-    init_db(conn)
+    monkeypatch.setenv("DB_PATH", str(db_path))
+    monkeypatch.setattr("src.main.CSV_CHUNK_ROWS", 2)
+    csv_path = tmp_path / "posts.csv"
+    csv_path.write_text("Video ID,Plays\nv1,1\n,2\nv3,3\nv1,4\nv5,5\n")
 
-    post = {
-        "post_id": "test456",
-        "views": 1000,
-        "likes": 100,
-    }
+    import_csv(str(csv_path))
 
-    with conn:
-        upsert_post(conn, post)
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT post_id, views FROM tiktok_posts ORDER BY post_id").fetchall()
+    assert rows == [("v1", 4), ("v3", 3), ("v5", 5)]
+    conn.close()
 
-    # Update with new views
-    post["views"] = 2000
-    with conn:
-        upsert_post(conn, post)
 
-    cur = conn.execute("SELECT views FROM tiktok_posts WHERE post_id = 'test456'")
-    row = cur.fetchone()
-    assert row[0] == 2000
+def test_import_csv_failure_restores_indexes(tmp_path, monkeypatch):
+    db_path = tmp_path / "test.db"
+    monkeypatch.setenv("DB_PATH", str(db_path))
+    monkeypatch.setattr("src.main.CSV_CHUNK_ROWS", 1)
+    csv_path = tmp_path / "posts.csv"
+    csv_path.write_text("post_id,views\np1,1\np2,2\n")
+    real_dataframe_to_posts = dataframe_to_posts
+    calls = []
+
+    def flaky_dataframe_to_posts(df):
+        calls.append(df)
+        if len(calls) == 2:
+            raise ValueError("bad chunk")
+        return real_dataframe_to_posts(df)
+
+    monkeypatch.setattr("src.main.dataframe_to_posts", flaky_dataframe_to_posts)
+
+    try:
+        import_csv(str(csv_path))
+        assert False, "Should have raised"
+    except ValueError:
+        pass
+
+    conn = sqlite3.connect(db_path)
+    indexes = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    assert conn.execute("SELECT COUNT(*) FROM tiktok_posts").fetchone()[0] == 0
     conn.close()
+    assert {"idx_tiktok_posts_created_at", "idx_tiktok_posts_epoch_views"} <= indexes
 
 
-# --- load_posts tests ---
+def test_import_verses_upserts_by_theme_and_reference(tmp_path, monkeypatch):
+    from src.db import connect as db_connect
+    from src.db import init_schema
 
-def test_load_posts_calculates_engagement(tmp_path):
     db_path = tmp_path / "test.db"
+    monkeypatch.setenv("DB_PATH", str(db_path))
+    conn = db_connect(str(db_path))
+    init_schema(conn)
+    conn.execute("INSERT INTO themes (slug, name) VALUES ('hope', 'Hope')")
+    conn.commit()
+    conn.close()
+
+    yaml_path = tmp_path / "verses.yaml"
+    yaml_path.write_text(
+        "verses:\n"
+        "  - {reference: 'Rom 15:13', text: old, theme: hope}\n"
+        "  - {reference: 'Ps 1:1', text: other, theme: missing}\n"
+    )
+    import_verses_cmd(str(yaml_path))
     conn = sqlite3.connect(db_path)
-    init_db(conn)
+    conn.execute("UPDATE bible_verses SET used_count = 3")
+    conn.commit()
+    first_id = conn.execute("SELECT id FROM bible_verses").fetchone()[0]
 
-    post = {
-        "post_id": "eng123",
-        "created_at": "2025-01-15T10:00:00+00:00",
-        "views": 1000,
-        "likes": 100,
-        "comments": 20,
-        "shares": 10,
-        "favorites": 50,
-    }
+    yaml_path.write_text("verses:\n  - {reference: 'Rom 15:13', text: new, theme: hope, tone: calm}\n")
+    import_verses_cmd(str(yaml_path))
+
+    rows = conn.execute("SELECT id, text, tone, used_count FROM bible_verses").fetchall()
+    assert rows == [(first_id, "new", "calm", 3)]
+    conn.close()
 
-    with conn:
-        upsert_post(conn, post)
 
-    df = load_posts(conn)
+def test_refresh_daily_stats_groups_by_central_day(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.db")
+    init_db(conn)
+    bulk_upsert_posts(conn, [
+        {"post_id": post_id, "created_at": created_at, "views": views, "likes": likes}
+        for post_id, created_at, views, likes in [
+            ("a", "2025-01-15T03:00:00+00:00", 100, 10),  # Jan 14 in Chicago
+            ("b", "2025-01-15T18:00:00+00:00", 0, 5),
+            ("c", "2025-01-15T20:00:00.500000+00:00", 300, 30),
+            ("d", None, 50, 1),  # undated posts are left out
+            ("e", "2025-01-15T21:00:00+00:00", None, 0),  # NULL views count as 0
+        ]
+    ])
+
+    assert refresh_daily_stats(conn) == 2
+    rows = conn.execute("SELECT day, views_sum, eng_sum, er_mean, n_posts FROM daily_stats ORDER BY day").fetchall()
     conn.close()
+    assert rows == [
+        ("2025-01-14", 100, 10, 0.1, 1),
+        ("2025-01-15", 300, 35, 0.1 / 3, 3),
+    ]
 
-    assert len(df) == 1
-    assert df.iloc[0]["engagement"] == 130  # likes + comments + shares
-    assert df.iloc[0]["engagement_rate"] == 0.13  # 130 / 1000
 
+# --- report aggregation tests ---
 
-def test_load_posts_handles_zero_views(tmp_path):
-    db_path = tmp_path / "test.db"
-    conn = sqlite3.connect(db_path)
+def test_summarize_posts_aggregates_in_sql(tmp_path):
+    conn = sqlite3.connect(tmp_path / "test.db")
     init_db(conn)
+    bulk_upsert_posts(conn, [
+        {"post_id": "a", "created_at": "2025-01-10T00:00:00+00:00", "views": 100, "likes": 10},
+        {"post_id": "b", "created_at": "2025-01-20T00:00:00+00:00", "views": 300, "shares": 3},
+        {"post_id": "c", "created_at": "2025-01-21T00:00:00+00:00", "views": 0, "likes": 5},
+        {"post_id": "d", "likes": 1},  # no date, no views
+    ])
+
+    summary = summarize_posts(conn)
+    assert summary["posts"] == 4
+    assert summary["total_views"] == 400
+    assert summary["total_engagement"] == 19
+    assert summary["total_shares"] == 3
+    assert summary["median_views"] == 50.0
+    # Per-post rates 0.1, 0.01, 0 (no views) and 0 (NULL views)
+    assert abs(summary["avg_engagement_rate"] - 0.0275) < 1e-12
+
+    since = int(pd.Timestamp("2025-01-15", tz="UTC").timestamp())
+    recent = summarize_posts(conn, since_epoch=since)
+    assert (recent["posts"], recent["median_views"]) == (2, 150.0)
+
+    top = top_posts_by_views(conn, 2, since_epoch=since)
+    conn.close()
+    assert top["post_id"].tolist() == ["b", "c"]
+    assert top["engagement_rate"].tolist() == [0.01, 0.0]
+
+
+def test_footage_prefetch_discards_unrecorded_clips_on_failure(tmp_path, monkeypatch):
+    from src.db import connect as db_connect
+    from src.db import init_schema, now_utc
+
+    db_path = str(tmp_path / "test.db")
+    conn = db_connect(db_path)
+    init_schema(conn)
+    reused, fresh = tmp_path / "reused.mp4", tmp_path / "fresh.mp4"
+    conn.execute(
+        "INSERT INTO stock_footage (source, external_id, url, download_path, created_at) "
+        "VALUES ('pexels', '1', 'https://example.com/1', ?, ?)",
+        (str(reused), now_utc()),
+    )
+    conn.commit()
+    conn.close()
 
-    post = {
-        "post_id": "zero123",
-        "views": 0,
-        "likes": 10,
-        "comments": 5,
-        "shares": 2,
-    }
+    def fake_fetch(keywords, theme_slug, db_path):
+        reused.write_bytes(b"clip")
+        fresh.write_bytes(b"clip")
+        return [({"external_id": "1"}, str(reused)), ({"external_id": "2"}, str(fresh))]
 
-    with conn:
-        upsert_post(conn, post)
+    monkeypatch.setattr("src.media.footage.fetch_footage", fake_fetch)
+    theme = {"keywords": '["hope"]', "name": "Hope", "slug": "hope"}
 
-    df = load_posts(conn)
-    conn.close()
+    try:
+        with _footage_prefetch(theme, db_path) as (keywords, future):
+            assert keywords == ["hope"]
+            future.result()  # downloads finished before TTS failed
+            raise RuntimeError("TTS failed")
+    except RuntimeError:
+        pass
+
+    assert reused.exists()
+    assert not fresh.exists()
 
-    assert len(df) == 1
-    assert df.iloc[0]["engagement_rate"] == 0.0  # no division by zero
@@ -4,6 +4,7 @@ from src.content.prayers import (
     TARGET_WORDS,
     _build_system_prompt,
     _build_user_prompt,
+    _tts_friendly_ref,
     generate_prayer_text_fallback,
     save_prayer,
 )
@@ -98,6 +99,12 @@ def test_fallback_adapts_to_theme():
     assert "legacy" in text2.lower()
 
 
+def test_tts_friendly_ref():
+    assert _tts_friendly_ref("John 3:16") == "John chapter 3, verse 16"
+    assert _tts_friendly_ref("1 John 4:7-8") == "1 John chapter 4, verses 7 through 8"
+    assert _tts_friendly_ref("Genesis 1") == "Genesis 1"
+
+
 def test_save_prayer(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)
@@ -132,6 +139,19 @@ def test_save_prayer_without_model(tmp_path):
     conn.close()
 
 
+def test_save_prayer_without_commit_joins_caller_transaction(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    theme, verse = _seed_theme_and_verse(conn)
+
+    save_prayer(conn, verse["id"], theme["id"], "Lord, hear our prayer.", commit=False)
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM prayers").fetchone()[0] == 0
+    conn.close()
+
+
 def test_generate_prayer_text_raises_without_openai(tmp_path, monkeypatch):
     """generate_prayer_text should raise RuntimeError when openai missing or no key."""
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
@@ -265,6 +265,25 @@ class TestGenerateSingleOverlay:
             assert "overlay_0" in path0
             assert "overlay_2" in path2
 
+    def test_out_path_writes_to_destination(self, tmp_path):
+        overlay_dir = tmp_path / "overlays"
+        dest = tmp_path / "samples" / "sample.png"
+        dest.parent.mkdir()
+        with patch('src.media.text_overlay.OVERLAY_DIR', overlay_dir):
+            path = generate_single_overlay(
+                verse_ref="Test 1:1",
+                verse_text="Test.",
+                prayer_text=" ".join(["word"] * 30),
+                theme_slug="loneliness",
+                chunk_index=0,
+                out_path=dest,
+            )
+
+            assert path == str(dest)
+            assert dest.exists()
+            assert not (overlay_dir / "overlay_0.png").exists()
+            assert list(dest.parent.iterdir()) == [dest]  # no temp file left behind
+
     def test_handles_custom_dimensions(self, tmp_path):
         overlay_dir = tmp_path / "overlays"
         with patch('src.media.text_overlay.OVERLAY_DIR', overlay_dir):
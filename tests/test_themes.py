@@ -158,3 +158,22 @@ def test_pick_theme_empty_db(tmp_path):
     theme = pick_theme(conn)
     assert theme is None
     conn.close()
+
+
+def test_get_active_themes_cache_sees_committed_changes(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    _seed_themes(conn)
+
+    first = get_active_themes(conn)
+    first.pop()  # callers get their own list
+    assert len(get_active_themes(conn)) == 3
+
+    other = connect(db_path)
+    other.execute("UPDATE themes SET is_active = 0 WHERE slug = 'grief'")
+    other.commit()
+    other.close()
+
+    assert {t["slug"] for t in get_active_themes(conn)} == {"retirement", "health"}
+    conn.close()
@@ -94,6 +94,20 @@ def test_pick_verse_prefers_least_used(tmp_path):
     conn.close()
 
 
+def test_pick_verse_treats_null_used_count_as_unused(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    init_schema(conn)
+    theme_id, verse_ids = _seed_theme_and_verses(conn, 2)
+
+    conn.execute("UPDATE bible_verses SET used_count = 1 WHERE id = ?", (verse_ids[0],))
+    conn.execute("UPDATE bible_verses SET used_count = NULL WHERE id = ?", (verse_ids[1],))
+    conn.commit()
+
+    assert pick_verse(conn, theme_id)["id"] == verse_ids[1]
+    conn.close()
+
+
 def test_mark_verse_used(tmp_path):
     db_path = str(tmp_path / "test.db")
     conn = connect(db_path)